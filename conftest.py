@@ -0,0 +1,10 @@
+import pytest
+
+from yatube.test_runner import isolated_caches
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_cache(tmp_path_factory):
+    """Свой файл кэша на каждый запуск pytest (см. yatube.test_runner)."""
+    with isolated_caches(str(tmp_path_factory.mktemp('cache'))):
+        yield
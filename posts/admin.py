@@ -1,13 +1,64 @@
 from django.contrib import admin
+from django.db.models import Q
 
+from . import search
 from .models import Post, Group, Comment, Follow
+from .paginators import EstimatedCountPaginator
 
 
-class PostAdmin(admin.ModelAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список для больших таблиц: без COUNT(*) по всей таблице.
+
+    Вместо фильтров по внешним ключам (они выводят в боковую панель
+    каждого пользователя и каждый пост) - поиск по индексу, а в формах
+    - выбор по id или автодополнение вместо списка всех строк.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = "-пусто-"
+
+
+class ExactUserSearchMixin:
+    """Поиск по точному имени пользователя из search_fields.
+
+    Поля вида '=связь__username' превращаются в связь__in по подзапросу
+    к уникальному индексу username, так что строки находятся по
+    индексу внешнего ключа, а не LIKE по всей таблице.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        query = Q()
+        for field in self.search_fields:
+            relation, lookup = field.lstrip('=').rsplit('__', 1)
+            related = queryset.model._meta.get_field(relation).related_model
+            query |= Q(**{f'{relation}__in': related.objects.filter(
+                **{lookup: term}).values('pk')})
+        return queryset.filter(query), False
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = ("text", "pub_date", "author", "group")
+    list_select_related = ("author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
-    empty_value_display = "-пусто-"
+    autocomplete_fields = ("author",)
+    # совпадает с индексом (-pub_date, id), сортировка без временного
+    # B-дерева
+    ordering = ("-pub_date", "id")
+
+    def get_search_results(self, request, queryset, search_term):
+        # вместо LIKE '%term%' по всей таблице ищем по индексу FTS5
+        if not search_term or not search.fts_available():
+            return super().get_search_results(
+                request, queryset, search_term)
+        # без слов запрос к индексу пуст, и FTS5 считает его ошибкой
+        if not search.build_match(search_term):
+            return queryset.none(), False
+        queryset = queryset.filter(pk__in=search.matching_ids(search_term))
+        return queryset, False
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -15,16 +66,34 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ExactUserSearchMixin, LargeTableAdmin):
     list_display = ("text", "post", "author", "created")
-    search_fields = ("text",)
-    list_filter = ("created", "post", "author")
-    empty_value_display = "-пусто-"
+    # строковое представление поста обращается к автору и группе
+    list_select_related = ("post__author", "post__group", "author")
+    search_fields = ("=author__username",)
+    list_filter = ("created",)
+    raw_id_fields = ("post",)
+    autocomplete_fields = ("author",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # точное имя автора или слова текста по индексу FTS5
+        found, use_distinct = super().get_search_results(
+            request, queryset, search_term)
+        if not search.build_match(search_term):
+            return found, use_distinct
+        if search.fts_available():
+            by_text = queryset.filter(pk__in=search.matching_ids(
+                search_term, search.COMMENT_FTS_TABLE))
+        else:
+            by_text = queryset.filter(text__icontains=search_term.strip())
+        return found | by_text, False
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(ExactUserSearchMixin, LargeTableAdmin):
     list_display = ("user", "author")
-    list_filter = ("user", "author")
+    list_select_related = ("user", "author")
+    search_fields = ("=user__username", "=author__username")
+    autocomplete_fields = ("user", "author")
 
 
 admin.site.register(Post, PostAdmin)
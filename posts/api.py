@@ -0,0 +1,177 @@
+"""Read-only API для постов, групп, комментариев и подписок.
+
+Списки отдаются страницами JSON с курсорной пагинацией (ссылки next и
+previous), а с параметром ?format=ndjson -- целиком потоком NDJSON:
+по одному объекту на строку, выборка читается через
+QuerySet.iterator(), поэтому выгрузка всей истории автора или группы
+не держит в памяти больше одной пачки строк.
+"""
+import json
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .models import Follow, Group, Post
+from .paginators import CursorPaginator
+
+NDJSON = 'ndjson'
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('limit должен быть целым числом')
+    if not 1 <= size <= settings.API_MAX_PAGE_SIZE:
+        raise BadRequest(
+            f'limit должен быть от 1 до {settings.API_MAX_PAGE_SIZE}')
+    return size
+
+
+def _link(request, **cursor):
+    """Ссылка на соседнюю страницу с теми же фильтрами."""
+    query = request.GET.copy()
+    for name in ('after', 'before'):
+        query.pop(name, None)
+    query.update(cursor)
+    return request.build_absolute_uri(f'?{query.urlencode()}')
+
+
+def serialize_post(post, request):
+    return {
+        'id': post.id,
+        'url': request.build_absolute_uri(
+            reverse('post', args=(post.author.username, post.id))),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'image': request.build_absolute_uri(post.image.url)
+        if post.image else None,
+        'comments_count': post.comments_count,
+    }
+
+
+def serialize_group(group, request):
+    return {
+        'id': group.id,
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+    }
+
+
+def serialize_comment(comment, request):
+    return {
+        'id': comment.id,
+        'post': comment.post_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def serialize_follow(follow, request):
+    return {
+        'id': follow.id,
+        'user': follow.user.username,
+        'author': follow.author.username,
+    }
+
+
+def _export(request, queryset, serialize):
+    """Потоковая выгрузка выборки в NDJSON."""
+    rows = queryset.iterator(chunk_size=settings.API_EXPORT_CHUNK_SIZE)
+    lines = (
+        json.dumps(serialize(obj, request), ensure_ascii=False) + '\n'
+        for obj in rows
+    )
+    return StreamingHttpResponse(
+        lines, content_type='application/x-ndjson; charset=utf-8')
+
+
+def _keyset_list(request, queryset, serialize, keys):
+    """Страница выборки по курсору (дата, id) от новых к старым."""
+    page = CursorPaginator(queryset, _page_size(request), keys).get_page(
+        request.GET.get('after'), request.GET.get('before'))
+    return _json({
+        'results': [serialize(obj, request) for obj in page],
+        'next': _link(request, after=page.next_cursor)
+        if page.has_next() else None,
+        'previous': _link(request, before=page.previous_cursor)
+        if page.has_previous() else None,
+    })
+
+
+def _id_list(request, queryset, serialize):
+    """Страница выборки без даты: по возрастанию id после ?after=<id>."""
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        raise BadRequest('after должен быть целым числом')
+    size = _page_size(request)
+    rows = list(queryset.filter(id__gt=after).order_by('id')[:size + 1])
+    return _json({
+        'results': [serialize(obj, request) for obj in rows[:size]],
+        'next': _link(request, after=rows[size - 1].id)
+        if len(rows) > size else None,
+    })
+
+
+def _list(request, queryset, serialize, keys=None):
+    try:
+        if request.GET.get('format') == NDJSON:
+            return _export(request, queryset, serialize)
+        if keys is None:
+            return _id_list(request, queryset, serialize)
+        return _keyset_list(request, queryset, serialize, keys)
+    except BadRequest as error:
+        return _json({'error': str(error)}, status=400)
+
+
+def post_list(request):
+    """Посты, можно отфильтровать по ?author=<username> и ?group=<slug>."""
+    posts = Post.objects.select_related('author', 'group')
+    if 'author' in request.GET:
+        posts = posts.filter(author__username=request.GET['author'])
+    if 'group' in request.GET:
+        posts = posts.filter(group__slug=request.GET['group'])
+    return _list(request, posts, serialize_post, keys=('pub_date', 'id'))
+
+
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id)
+    return _json(serialize_post(post, request))
+
+
+def group_list(request):
+    return _list(request, Group.objects.all(), serialize_group)
+
+
+def comment_list(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    comments = post.comments.select_related('author')
+    return _list(
+        request, comments, serialize_comment, keys=('created', 'id'))
+
+
+def follow_list(request):
+    """Подписки, можно отфильтровать по ?user=<username> и ?author=..."""
+    follows = Follow.objects.select_related('user', 'author')
+    if 'user' in request.GET:
+        follows = follows.filter(user__username=request.GET['user'])
+    if 'author' in request.GET:
+        follows = follows.filter(author__username=request.GET['author'])
+    return _list(request, follows, serialize_follow)
@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        # подключаем обработчики сигналов моделей
+        from . import signals
+        from .db import configure_connection
+        connection_created.connect(configure_connection)
+        post_migrate.connect(signals.migrated, sender=self)
@@ -0,0 +1,99 @@
+"""Помощники для массовой загрузки данных.
+
+bulk_create не вызывает сигналы, поэтому производные данные (ленты,
+счетчики) после загрузки пересчитываются отдельно одним проходом.
+"""
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import connections, router, transaction
+from django.db.transaction import TransactionManagementError
+
+from .counters import repair_comments_count
+from .stats import recount_stats
+from .timeline import rebuild_timelines
+from .trending import rebuild as rebuild_trending
+
+
+def batched(iterable, size):
+    """Разбивает поток объектов на списки не длиннее size.
+
+    Размер пачки для самого INSERT Django подбирает сам (в SQLite он
+    ограничен числом параметров запроса), здесь же задается объем
+    данных на одну транзакцию.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def keep_auto_now_add(*models):
+    """Временно отключает auto_now_add, чтобы сохранить исходные даты.
+
+    Влияет на весь процесс, поэтому подходит только для команд
+    управления, а не для кода, работающего в запросах.
+    """
+    fields = [
+        field
+        for model in models
+        for field in model._meta.local_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def bulk_insert(model, objects):
+    """bulk_create, возвращающий id созданных строк в порядке objects.
+
+    Вызывается внутри posts.db.write_transaction. SQLite не возвращает
+    id из массовой вставки, но под блокировкой записи другие соединения
+    строк не добавляют, а AUTOINCREMENT выдает id по возрастанию в
+    порядке вставки: созданные строки - те, чей id больше наибольшего
+    до вставки. Если их число не совпало, бросает
+    TransactionManagementError.
+    """
+    using = router.db_for_write(model)
+    if not connections[using].in_atomic_block:
+        raise TransactionManagementError(
+            'bulk_insert вызывается внутри транзакции записи')
+    pks = model.objects.using(using).order_by('pk').values_list(
+        'pk', flat=True)
+    last = pks.last()
+    objects = model.objects.using(using).bulk_create(objects)
+    if not objects or objects[0].pk is not None:
+        return [obj.pk for obj in objects]
+    if last is not None:
+        pks = pks.filter(pk__gt=last)
+    created = list(pks)
+    if len(created) != len(objects):
+        raise TransactionManagementError(
+            f'вставлено {len(objects)} строк {model._meta.label}, а новых '
+            f'id {len(created)}: транзакция не держит блокировку записи')
+    return created
+
+
+@transaction.atomic
+def refresh_derived_data(post_ids=None, user_ids=None):
+    """Пересчитывает счетчики комментариев, статистику авторов и ленты.
+
+    Без аргументов пересчитывает все, включая оценки популярных постов;
+    иначе только для переданных постов (comments_count) и
+    пользователей (статистика и ленты).
+    """
+    if post_ids is None:
+        rebuild_trending()
+    if post_ids is None or post_ids:
+        repair_comments_count(post_ids)
+    if user_ids is None or user_ids:
+        recount_stats(user_ids)
+        rebuild_timelines(user_ids)
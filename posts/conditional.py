@@ -0,0 +1,94 @@
+"""Условные GET-запросы (ETag) для лент и страницы поста.
+
+Валидатор страницы собирается из дешевых данных: id постов страницы
+(выборка одних ключевых полей по индексу ленты), версий их карточек
+из кэша (см. versions) и числа постов для пагинатора. Если клиент
+прислал совпадающий If-None-Match, отдается 304 без загрузки постов
+и рендеринга шаблона.
+
+Last-Modified не отдается: у постов нет времени изменения, а дата
+публикации не меняется при правке и новых комментариях.
+
+Тот же ETag служит ключом кэша готовых страниц для анонимов: он
+меняется вместе со всем, что попадает на страницу.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from yatube.routers import cache_alias
+from .versions import card_objects, get_versions
+
+# поля, которых достаточно для валидатора и курсора страницы
+KEY_FIELDS = ('id', 'pub_date', 'author_id', 'group_id')
+
+
+def make_etag(request, *parts):
+    """Слабый ETag из частей страницы, читателя и строки запроса.
+
+    Страница зависит от читателя (меню, ссылки на правку, подписка),
+    поэтому его id входит в валидатор.
+    """
+    raw = json.dumps(
+        [request.user.pk, request.get_full_path(), *parts], default=str)
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def page_validators(page):
+    """Части ETag для страницы постов, загруженной с KEY_FIELDS."""
+    objects = [item for post in page for item in card_objects(post)]
+    parts = [[post.id for post in page], get_versions(*objects)]
+    if not getattr(page, 'cursor_mode', False):
+        parts.append(page.paginator.count)
+    return parts
+
+
+def not_modified(request, etag):
+    """Ответ 304, если у клиента актуальная версия страницы."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    return get_conditional_response(request, etag=etag)
+
+
+def load_posts(page, post_list):
+    """Подменяет ключи постов на странице полными объектами из post_list.
+
+    Посты, удаленные между двумя запросами, пропускаются.
+    """
+    posts = post_list.in_bulk([post.id for post in page])
+    page.object_list = [
+        posts[post.id] for post in page if post.id in posts]
+
+
+def set_etag(response, etag):
+    response['ETag'] = etag
+    return response
+
+
+def _page_key(etag):
+    return f'page:{etag}'
+
+
+def cached_page(request, etag):
+    """Готовая страница для анонима из кэша или None."""
+    if request.user.is_authenticated:
+        return None
+    content = cache.get(_page_key(etag))
+    if content is None:
+        return None
+    return set_etag(HttpResponse(content), etag)
+
+
+def cache_page(request, response, etag):
+    """Сохраняет отрендеренную для анонима страницу и ставит ETag.
+
+    Страница, прочитанная с реплики, не сохраняется (см. cache_alias).
+    """
+    if not request.user.is_authenticated and response.status_code == 200:
+        caches[cache_alias()].set(_page_key(etag), response.content,
+                                  settings.PAGE_CACHE_TIMEOUT)
+    return set_etag(response, etag)
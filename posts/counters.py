@@ -0,0 +1,25 @@
+"""Денормализованные счетчики постов."""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Post
+
+
+def change_comments_count(post_id, delta):
+    """Атомарно сдвигает счетчик комментариев поста на delta."""
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta)
+
+
+def repair_comments_count(post_ids=None):
+    """Пересчитывает comments_count одним UPDATE по подзапросу.
+
+    Возвращает количество обновленных постов.
+    """
+    counts = (Comment.objects.filter(post=OuterRef('pk')).order_by()
+              .values('post').annotate(total=Count('id')).values('total'))
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    return posts.update(comments_count=Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0))
@@ -0,0 +1,83 @@
+"""Настройка соединений SQLite и транзакции записи.
+
+configure_connection применяет SQLITE_PRAGMAS к каждому новому
+соединению. В режиме WAL читатели не блокируют писателя, но писатель
+в базе по-прежнему один: если транзакция сначала читала, а потом
+пишет, а другой процесс успел записать раньше, SQLite сразу отвечает
+«database is locked», не дожидаясь busy_timeout. Поэтому запись идет
+в write_transaction: блокировка берется в самом начале, BEGIN
+IMMEDIATE, и повторяется только он, пока код внутри еще ничего не
+сделал.
+"""
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+
+logger = logging.getLogger('yatube.db')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: прагмы для соединений SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(settings.SQLITE_PRAGMAS)
+    if connection.alias != DEFAULT_DB_ALIAS:
+        # реплики подменяются целым файлом (sync_replica), и файлы
+        # -wal/-shm рядом с ними остались бы от старой копии
+        pragmas.pop('journal_mode', None)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return 'locked' in str(error)
+
+
+def _begin(connection, using):
+    """Открывает atomic() с BEGIN IMMEDIATE (yatube.backends.sqlite3).
+
+    Если за busy_timeout блокировку получить не удалось, BEGIN
+    повторяется до WRITE_RETRY_ATTEMPTS раз с растущей случайной паузой
+    от WRITE_RETRY_DELAY секунд.
+    """
+    attempts = settings.WRITE_RETRY_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        stack = ExitStack()
+        connection.begin_immediate = True
+        try:
+            stack.enter_context(transaction.atomic(using=using))
+            return stack
+        except OperationalError as error:
+            if not is_locked(error) or attempt == attempts:
+                raise
+        finally:
+            connection.begin_immediate = False
+        logger.warning(
+            '%s: база заблокирована, попытка %d из %d',
+            connection.alias, attempt, attempts)
+        time.sleep(
+            settings.WRITE_RETRY_DELAY * 2 ** (attempt - 1)
+            * random.uniform(0.5, 1.5))
+
+
+@contextmanager
+def write_transaction(using=None):
+    """atomic(), который сразу берет блокировку записи SQLite.
+
+    Ожидание блокировки и его повторы происходят до входа в блок, так
+    что код внутри выполняется один раз и не падает на блокировке
+    посередине: файлы, кэш и прочие побочные эффекты не повторяются.
+    Внутри уже открытой транзакции это обычный atomic().
+    """
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    with _begin(connection, using):
+        yield
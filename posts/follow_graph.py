@@ -0,0 +1,54 @@
+"""Подписки пользователей в общем кэше.
+
+Для каждого пользователя кэшируется множество id авторов, на которых
+он подписан: по нему страницы поста и профиля решают, показывать ли
+кнопку подписки, а рекомендации исключают уже читаемых авторов. При
+промахе множество читается из Follow одним запросом; сигналы Follow
+сбрасывают его. Счетчики подписчиков хранит AuthorStats, а ленты
+раздаются по таблице Follow.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+PREFIX = 'follow'
+
+
+def _key(user_id):
+    return f'{PREFIX}:following:{user_id}'
+
+
+def following(user_id):
+    """id авторов, на которых подписан пользователь."""
+    key = _key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = set(Follow.objects.filter(user_id=user_id).values_list(
+            'author_id', flat=True))
+        cache.set(key, ids, settings.FOLLOW_GRAPH_TIMEOUT)
+    return ids
+
+
+def is_following(user, author):
+    """Подписан ли user на author; для анонима всегда False."""
+    if not user.is_authenticated or user.pk == author.pk:
+        return False
+    return author.pk in following(user.pk)
+
+
+def changed(follow):
+    """Сбрасывает множество подписчика; оно соберется из базы.
+
+    Ключ удаляется сразу и еще раз после фиксации транзакции: так
+    запрос, успевший перечитать множество до фиксации, не оставит в
+    кэше старое состояние. Множество не правится на месте, потому что
+    одновременные подписки одного пользователя потеряли бы одно из
+    изменений. Массовые bulk_create и update сигналов не вызывают, и
+    для них устаревшее множество живет до FOLLOW_GRAPH_TIMEOUT, поэтому
+    оно годится только для проверок на чтение, а не для записи лент.
+    """
+    key = _key(follow.user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
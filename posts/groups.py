@@ -0,0 +1,53 @@
+"""Каталог сообществ.
+
+Для каждой группы нужны число постов, время последнего поста и сам
+последний пост. Агрегаты считаются одним запросом по всем группам
+(последний пост берется коррелированным подзапросом по индексу
+(group, -pub_date)), посты для превью загружаются вторым запросом.
+Результат живет в общем кэше GROUP_DIRECTORY_TIMEOUT секунд, то есть
+пересчитывается не чаще этого, сколько бы ни было просмотров.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Subquery
+
+from .models import Group, Post
+
+DIRECTORY_KEY = 'groups:directory'
+
+
+def summarize():
+    """Группы с posts_count, last_activity и latest_post, от активных."""
+    latest = (Post.objects.filter(group=OuterRef('pk'))
+              .order_by('-pub_date').values('id')[:1])
+    groups = list(Group.objects.annotate(
+        posts_count=Count('posts'),
+        last_activity=Max('posts__pub_date'),
+        latest_post_id=Subquery(latest),
+    ).order_by())
+    # групп немного, и порядок по агрегату дешевле навести в Python,
+    # чем сортировать результат GROUP BY во временном B-дереве
+    groups.sort(key=lambda group: group.title)
+    groups.sort(key=lambda group: group.last_activity or datetime.min,
+                reverse=True)
+    posts = Post.objects.select_related('author').in_bulk(
+        [group.latest_post_id for group in groups if group.latest_post_id])
+    for group in groups:
+        group.latest_post = posts.get(group.latest_post_id)
+    return groups
+
+
+def directory():
+    """Сводка по группам из кэша; при промахе считается заново."""
+    groups = cache.get(DIRECTORY_KEY)
+    if groups is None:
+        groups = summarize()
+        cache.set(DIRECTORY_KEY, groups, settings.GROUP_DIRECTORY_TIMEOUT)
+    return groups
+
+
+def invalidate():
+    """Сбрасывает сводку, например после создания или правки группы."""
+    cache.delete(DIRECTORY_KEY)
@@ -0,0 +1,72 @@
+"""Прием картинок постов.
+
+Загрузка приходит во временный файл на диске (TemporaryFileUploadHandler),
+размер картинки проверяется по заголовку до декодирования пикселей,
+затем картинка уменьшается до POST_IMAGE_MAX_SIZE по большей стороне,
+поворачивается по EXIF и пересохраняется в POST_IMAGE_FORMAT без
+метаданных. В хранилище попадает уже компактный файл, и sorl при
+построении превью декодирует его, а не исходную фотографию.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+# форматы без прозрачности: альфа-канал накладывается на белый фон
+OPAQUE_FORMATS = {'JPEG'}
+
+
+def _flatten(image, opaque):
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        if not opaque:
+            return image
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def ingest(upload):
+    """Возвращает уменьшенную и перекодированную копию загрузки.
+
+    Бросает ValidationError для слишком больших по числу пикселей
+    и нечитаемых картинок.
+    """
+    max_size = settings.POST_IMAGE_MAX_SIZE
+    image_format = settings.POST_IMAGE_FORMAT
+    upload.seek(0)
+    try:
+        with Image.open(upload) as image:
+            # Image.open читает только заголовок: размер известен до
+            # того, как пиксели распакованы в память
+            width, height = image.size
+            if width * height > settings.POST_IMAGE_MAX_PIXELS:
+                raise ValidationError(
+                    'Слишком большое изображение: %(width)s×%(height)s',
+                    code='image_too_large',
+                    params={'width': width, 'height': height},
+                )
+            # JPEG декодируется сразу в уменьшенном масштабе
+            image.draft('RGB', (max_size, max_size))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+            image = _flatten(image, image_format in OPAQUE_FORMATS)
+    except (OSError, Image.DecompressionBombError) as error:
+        raise ValidationError(
+            'Не удалось прочитать изображение', code='invalid_image',
+        ) from error
+    output = io.BytesIO()
+    # exif не передается, поэтому метаданные (геометка, модель камеры)
+    # в сохраненный файл не попадают
+    image.save(
+        output, image_format, quality=settings.POST_IMAGE_QUALITY,
+        optimize=True,
+    )
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return ContentFile(
+        output.getvalue(), name=f'{stem}.{EXTENSIONS[image_format]}')
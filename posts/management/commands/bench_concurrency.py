@@ -0,0 +1,164 @@
+import json
+import multiprocessing
+import random
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .bench_views import percentile
+
+MODES = ('baseline', 'tuned')
+
+
+def configure(mode):
+    """Настраивает процесс на режим: baseline - SQLite по умолчанию
+    (журнал отката, соединение на запрос, без повторов), tuned -
+    настройки проекта."""
+    if mode == 'baseline':
+        settings.SQLITE_PRAGMAS = {}
+        settings.WRITE_RETRY_ATTEMPTS = 1
+        connections['default'].settings_dict['CONN_MAX_AGE'] = 0
+
+
+def worker(mode, seed, deadline, write_ratio, usernames, posts, results):
+    """Процесс нагрузки: смешанные чтения и записи до deadline."""
+    configure(mode)
+    rng = random.Random(seed)
+    stats = {'read': [], 'write': []}
+    errors = Counter()
+    try:
+        client = Client()
+        client.force_login(User.objects.get(username=rng.choice(usernames)))
+        load(client, rng, seed, deadline, write_ratio, posts, stats, errors)
+    finally:
+        connections.close_all()
+        results.put((stats, dict(errors)))
+
+
+def load(client, rng, seed, deadline, write_ratio, posts, stats, errors):
+    while time.monotonic() < deadline:
+        kind = 'write' if rng.random() < write_ratio else 'read'
+        author, post_id = rng.choice(posts)
+        if kind == 'read':
+            request = rng.choice((
+                lambda: client.get(reverse('index')),
+                lambda: client.get(reverse('profile', args=(author,))),
+                lambda: client.get(reverse('post', args=(author, post_id))),
+            ))
+        else:
+            request = rng.choice((
+                lambda: client.post(reverse('new_post'), {
+                    'text': f'Нагрузочный пост {seed}'}),
+                lambda: client.post(
+                    reverse('add_comment', args=(author, post_id)),
+                    {'text': f'Нагрузочный комментарий {seed}'}),
+                lambda: client.get(reverse('profile_follow', args=(author,))),
+                lambda: client.get(
+                    reverse('profile_unfollow', args=(author,))),
+            ))
+        started = time.perf_counter()
+        try:
+            response = request()
+        except Exception as error:
+            errors[f'{kind}: {error}'] += 1
+            continue
+        if response.status_code >= 500:
+            errors[f'{kind}: ответ {response.status_code}'] += 1
+            continue
+        stats[kind].append((time.perf_counter() - started) * 1000)
+
+
+class Command(BaseCommand):
+    help = ('Нагружает базу смешанными чтениями и записями из нескольких '
+            'процессов и сравнивает пропускную способность и долю ошибок '
+            'SQLite по умолчанию и с настройками проекта')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='длительность прогона каждого режима, секунд')
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.3,
+            help='доля запросов с записью')
+        parser.add_argument(
+            '--mode', choices=MODES + ('both',), default='both')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', help='файл для отчета (по умолчанию stdout)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Сравнение настроек имеет смысл для SQLite')
+        usernames = list(User.objects.values_list('username', flat=True))
+        posts = list(Post.objects.values_list('author__username', 'id'))
+        if not usernames or not posts:
+            raise CommandError(
+                'База пуста, сначала запустите manage.py seed_yatube')
+        modes = MODES if options['mode'] == 'both' else (options['mode'],)
+        report = {
+            'processes': options['processes'],
+            'duration_s': options['duration'],
+            'write_ratio': options['write_ratio'],
+            'modes': {
+                mode: self.run(mode, usernames, posts, options)
+                for mode in modes
+            },
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def run(self, mode, usernames, posts, options):
+        # режим журнала хранится в самом файле базы, его меняет только
+        # этот процесс, пока рабочие еще не открыли соединений
+        journal_mode = 'wal' if mode == 'tuned' else 'delete'
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+        # дочерние процессы не должны унаследовать открытое соединение
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        deadline = time.monotonic() + options['duration']
+        processes = [
+            context.Process(target=worker, args=(
+                mode, options['seed'] + number, deadline,
+                options['write_ratio'], usernames, posts, results))
+            for number in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        timings = {'read': [], 'write': []}
+        errors = Counter()
+        for _ in processes:
+            stats, process_errors = results.get()
+            for kind, values in stats.items():
+                timings[kind].extend(values)
+            errors.update(process_errors)
+        for process in processes:
+            process.join()
+        report = {'errors': dict(errors.most_common())}
+        for kind, values in timings.items():
+            failed = sum(count for error, count in errors.items()
+                         if error.startswith(f'{kind}:'))
+            total = len(values) + failed
+            report[kind] = {
+                'requests': total,
+                'per_second': round(len(values) / options['duration'], 1),
+                'error_rate': round(failed / total, 4) if total else 0,
+                'p50_ms': round(percentile(values, 0.50), 3)
+                if values else None,
+                'p95_ms': round(percentile(values, 0.95), 3)
+                if values else None,
+            }
+        return report
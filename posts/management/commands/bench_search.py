@@ -0,0 +1,67 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Post
+from posts.search import TOKEN, SearchResults, fts_available, like_search
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость поиска через FTS5 и через LIKE'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'terms', nargs='*',
+            help='поисковые запросы; по умолчанию слова из случайных постов')
+        parser.add_argument('--samples', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=10)
+
+    def sample_terms(self, samples):
+        texts = Post.objects.order_by('?').values_list(
+            'text', flat=True)[:samples]
+        words = [TOKEN.findall(text) for text in texts]
+        return [random.choice(found) for found in words if found]
+
+    def measure(self, search, terms, repeat):
+        timings = []
+        for term in terms:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                search(term)
+                timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'mean_ms': round(statistics.mean(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'max_ms': round(max(timings), 3),
+        }
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        terms = options['terms'] or self.sample_terms(options['samples'])
+        if not terms:
+            raise CommandError('Нет постов для выбора поисковых слов')
+        size = options['page_size']
+
+        # обе ветки считают общее число совпадений и берут первую страницу
+        def fts(term):
+            results = SearchResults(term)
+            results.count()
+            results[:size]
+
+        def like(term):
+            posts = like_search(term)
+            posts.count()
+            list(posts[:size])
+
+        report = {
+            'posts': Post.objects.count(),
+            'terms': len(terms),
+            'fts5': self.measure(fts, terms, options['repeat']),
+            'like': self.measure(like, terms, options['repeat']),
+        }
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,105 @@
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.management.commands.bench_views import percentile
+from posts.models import Comment, Post, User
+
+
+class Rollback(Exception):
+    """Откатывает добавленные бенчмарком комментарии."""
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает ленту популярного по оценкам с группировкой '
+            'комментариев по мере их добавления; все изменения '
+            'откатываются, результат выводится в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=4)
+        parser.add_argument(
+            '--comments', type=int, default=500,
+            help='сколько комментариев добавлять за раунд')
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def timed(self, call, iterations):
+        timings = []
+        queries = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+        return {
+            'queries': max(queries),
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+        }
+
+    def measure(self, iterations):
+        client = Client()
+        url = reverse('trending')
+
+        def feed():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+
+        # обе ветки строят топ и загружают первую страницу постов
+        def first_page(post_ids):
+            Post.objects.select_related('author', 'group').in_bulk(
+                post_ids[:settings.NUM_OBJECTS_PER_PAGE])
+
+        def scores():
+            first_page(trending.top_ids())
+
+        # тот же топ, посчитанный группировкой всех недавних комментариев
+        def group_by():
+            since = timezone.now() - timedelta(
+                seconds=settings.TRENDING_WINDOW)
+            first_page(list(Comment.objects.filter(
+                created__gte=since,
+            ).values('post').annotate(total=Count('id')).order_by(
+                '-total').values_list('post', flat=True)[
+                :settings.TRENDING_SIZE]))
+
+        return {
+            'view': self.timed(feed, iterations),
+            'scores': self.timed(scores, iterations),
+            'group_by': self.timed(group_by, iterations),
+        }
+
+    def handle(self, *args, **options):
+        post_ids = list(Post.objects.values_list('id', flat=True)[:1000])
+        user = User.objects.first()
+        if not (post_ids and user):
+            raise CommandError(
+                'База пуста, сначала запустите manage.py seed_yatube')
+        report = {'iterations': options['iterations'], 'rounds': []}
+        try:
+            with transaction.atomic():
+                for _ in range(options['rounds']):
+                    # через create, чтобы сработали сигналы и оценки
+                    for _ in range(options['comments']):
+                        Comment.objects.create(
+                            text='Комментарий бенчмарка', author=user,
+                            post_id=random.choice(post_ids))
+                    round_report = self.measure(options['iterations'])
+                    round_report['comments'] = Comment.objects.count()
+                    report['rounds'].append(round_report)
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
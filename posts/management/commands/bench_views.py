@@ -0,0 +1,114 @@
+import json
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import AuthorStats, Group, Post
+
+VIEWS = ('index', 'group_posts', 'profile', 'post_view', 'follow_index')
+
+
+def percentile(values, share):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(int(round(share * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет ленты и страницу поста через тестовый клиент и '
+            'выводит число запросов и перцентили задержки в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--views', default=','.join(VIEWS),
+            help='список через запятую, по умолчанию все: '
+                 + ', '.join(VIEWS))
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='очищать кэш перед каждым запросом')
+        parser.add_argument(
+            '--output', help='файл для отчета (по умолчанию stdout)')
+
+    def targets(self):
+        """Выбирает самые тяжелые страницы: популярные группу, автора
+        и пост, читателя с наибольшим числом подписок."""
+        group = Group.objects.annotate(
+            posts_total=Count('posts')).order_by('-posts_total').first()
+        author = AuthorStats.objects.select_related('user').order_by(
+            '-posts_count').first()
+        post = Post.objects.select_related('author').order_by(
+            '-comments_count').first()
+        reader = AuthorStats.objects.select_related('user').order_by(
+            '-following_count').first()
+        if not (group and author and post and reader):
+            raise CommandError(
+                'База пуста, сначала запустите manage.py seed_yatube')
+        return {
+            'index': (reverse('index'), None),
+            'group_posts': (reverse('group_posts', args=(group.slug,)), None),
+            'profile': (
+                reverse('profile', args=(author.user.username,)), None),
+            'post_view': (
+                reverse('post', args=(post.author.username, post.id)), None),
+            'follow_index': (reverse('follow_index'), reader.user),
+        }
+
+    def measure(self, url, user, iterations, warmup, cold):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        timings = []
+        queries = []
+        for step in range(warmup + iterations):
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            if step >= warmup:
+                timings.append(elapsed)
+                queries.append(len(captured))
+        return {
+            'url': url,
+            'queries': max(queries),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+        }
+
+    def handle(self, *args, **options):
+        names = [name for name in options['views'].split(',') if name]
+        unknown = set(names) - set(VIEWS)
+        if unknown:
+            raise CommandError(f'Неизвестные страницы: {", ".join(unknown)}')
+        targets = self.targets()
+        report = {
+            'iterations': options['iterations'],
+            'cold_cache': options['cold'],
+            'views': {
+                name: self.measure(
+                    *targets[name], options['iterations'],
+                    options['warmup'], options['cold'])
+                for name in names
+            },
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,110 @@
+import os
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+
+from posts import media, versions
+from posts.models import Post
+from posts.storage import content_name
+
+# имя, уже построенное ContentAddressedStorage
+HASHED = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+class Command(BaseCommand):
+    help = ('Переносит картинки постов в хранилище с адресацией по '
+            'содержимому, объединяя одинаковые файлы, и сообщает, '
+            'сколько места освобождено')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete-orphans', action='store_true',
+            help='удалить файлы в каталоге постов, на которые нет ссылок')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='только посчитать, ничего не меняя')
+
+    def handle(self, *args, **options):
+        self.storage = Post._meta.get_field('image').storage
+        self.dry_run = options['dry_run']
+        self.reclaimed = 0
+        names = (Post.objects.exclude(image='').exclude(image__isnull=True)
+                 .order_by().values_list('image', flat=True).distinct())
+        moved = merged = missing = 0
+        planned = set()
+        for name in list(names):
+            if HASHED.search(name):
+                continue
+            if not self.storage.exists(name):
+                missing += 1
+                self.stderr.write(f'Нет файла {name}')
+                continue
+            moved += 1
+            merged += self.move(name, planned)
+        orphans = 0
+        if options['delete_orphans']:
+            orphans = self.delete_orphans('posts')
+        self.stdout.write(
+            f'Перенесено файлов: {moved}, из них дубликатов: {merged}, '
+            f'без файла: {missing}, удалено ненужных: {orphans}. '
+            f'Освобождено {filesizeformat(self.reclaimed)}'
+            + (' (пробный запуск)' if self.dry_run else ''))
+        if moved and not self.dry_run:
+            self.stdout.write(
+                'Превью для новых имен подготовит manage.py '
+                'generate_thumbnails')
+
+    def move(self, name, planned):
+        """Переносит файл под имя по хэшу, возвращает, дубликат ли он."""
+        with self.storage.open(name) as content:
+            size = content.size
+            target = content_name(name, content)
+            duplicate = target in planned or self.storage.exists(target)
+            planned.add(target)
+            if not self.dry_run:
+                self.storage.save(name, content)
+        if self.dry_run:
+            # пробный запуск ничего не удаляет: освободятся дубликаты
+            if duplicate:
+                self.reclaimed += size
+            return duplicate
+        if not duplicate:
+            # содержимое записано под новым именем
+            self.reclaimed -= size
+        self.repoint(name, target)
+        return duplicate
+
+    def repoint(self, name, target):
+        """Переводит посты на новый файл и удаляет старый с его превью."""
+        with transaction.atomic():
+            posts = Post.objects.filter(image=name)
+            post_ids = list(posts.values_list('id', flat=True))
+            posts.update(image=target)
+            # в кэшированных карточках ссылка на превью старого файла
+            for post_id in post_ids:
+                versions.bump('post', post_id)
+        size = self.storage.size(name)
+        if media.delete_unreferenced(name):
+            self.reclaimed += size
+
+    def delete_orphans(self, directory):
+        """Удаляет файлы без ссылок из постов, возвращает их число."""
+        if not self.storage.exists(directory):
+            return 0
+        deleted = 0
+        directories, files = self.storage.listdir(directory)
+        for subdirectory in directories:
+            deleted += self.delete_orphans(
+                os.path.join(directory, subdirectory))
+        for file_name in files:
+            name = os.path.join(directory, file_name)
+            # недописанные файлы конкурентных загрузок
+            if file_name.startswith('.upload-') or media.is_referenced(name):
+                continue
+            size = self.storage.size(name)
+            if self.dry_run or media.delete_unreferenced(name):
+                self.reclaimed += size
+                deleted += 1
+        return deleted
@@ -0,0 +1,58 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate
+
+
+def _init_worker():
+    # при запуске через spawn дочернему процессу нужна настройка Django
+    django.setup()
+
+
+def _generate(name):
+    try:
+        generate(name)
+    except Exception as error:
+        return name, str(error)
+    finally:
+        connections.close_all()
+    return name, None
+
+
+class Command(BaseCommand):
+    help = ('Готовит превью для картинок всех существующих постов '
+            'параллельно на нескольких ядрах')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='число процессов (по умолчанию - число ядер)')
+        parser.add_argument('--chunk-size', type=int, default=16)
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image='').exclude(image__isnull=True)
+            .order_by().values_list('image', flat=True).distinct())
+        # дочерние процессы не должны наследовать открытые соединения
+        connections.close_all()
+        started = time.perf_counter()
+        failed = 0
+        with ProcessPoolExecutor(
+                max_workers=options['workers'],
+                initializer=_init_worker) as pool:
+            results = pool.map(
+                _generate, names, chunksize=options['chunk_size'])
+            for name, error in results:
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок: {len(names)}, ошибок: {failed}, '
+            f'время: {elapsed:.1f} с'))
@@ -0,0 +1,225 @@
+import csv
+import json
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import trending
+from posts.bulk import batched, bulk_insert, keep_auto_now_add
+from posts.db import write_transaction
+from posts.models import Comment, Group, Post, User
+from posts.stats import recount_stats
+from posts.timeline import fan_out_posts
+
+FORMATS = ('jsonl', 'csv')
+
+
+class SkipRecord(ValueError):
+    pass
+
+
+def parse_date(value):
+    """Дата из ISO 8601 с учетом настройки USE_TZ."""
+    # в JSON дата может оказаться числом или объектом
+    date = parse_datetime(value) if isinstance(value, str) else None
+    if date is None:
+        raise SkipRecord(f'неверная дата {value!r}')
+    if settings.USE_TZ and timezone.is_naive(date):
+        return timezone.make_aware(date)
+    if not settings.USE_TZ and timezone.is_aware(date):
+        return timezone.make_naive(date)
+    return date
+
+
+class Command(BaseCommand):
+    help = ('Загружает посты из JSONL или CSV пачками через bulk_create '
+            'с сохранением исходных дат. Записи JSONL могут содержать '
+            'список comments с комментариями к посту')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='файл .jsonl или .csv, "-" - стандартный ввод')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='формат входа, по умолчанию по расширению файла')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='постов в одной транзакции')
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='создавать неизвестных авторов без пароля')
+        parser.add_argument(
+            '--create-groups', action='store_true',
+            help='создавать неизвестные группы (название = slug)')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or options['path'].rpartition('.')[2]
+        if fmt not in FORMATS:
+            raise CommandError('Укажите --format: jsonl или csv')
+        self.create_authors = options['create_authors']
+        self.create_groups = options['create_groups']
+        self.verbosity = options['verbosity']
+        # справочники в памяти вместо запроса на каждую строку
+        self.authors = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.totals = Counter()
+        started = time.perf_counter()
+        source = (sys.stdin if options['path'] == '-'
+                  else open(options['path'], newline='', encoding='utf-8'))
+        try:
+            records = (self.read_csv(source) if fmt == 'csv'
+                       else self.read_jsonl(source))
+            with keep_auto_now_add(Post, Comment):
+                for batch in batched(records, options['batch_size']):
+                    self.import_batch(batch)
+                    if self.verbosity > 1:
+                        self.report(started)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        # комментарии загружены в обход сигналов: оценки популярных
+        # постов пересчитываются один раз по окну TRENDING_WINDOW
+        if self.totals['comments']:
+            trending.rebuild()
+        self.report(started)
+
+    def report(self, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Постов: {self.totals["posts"]}, '
+            f'комментариев: {self.totals["comments"]}, '
+            f'пропущено: {self.totals["skipped"]} '
+            f'за {elapsed:.1f} с '
+            f'({self.totals["posts"] / max(elapsed, 1e-9):.0f} постов/с)')
+
+    def read_jsonl(self, source):
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                self.skip(line_number, f'неверный JSON: {error}')
+                continue
+            yield line_number, record
+
+    def read_csv(self, source):
+        # строка 1 - заголовок с именами колонок
+        for line_number, record in enumerate(csv.DictReader(source), 2):
+            yield line_number, record
+
+    def skip(self, line_number, reason):
+        self.totals['skipped'] += 1
+        if self.verbosity > 1:
+            self.stderr.write(f'Строка {line_number}: {reason}')
+
+    def prepare(self, record):
+        """Проверяет запись: (автор, группа, поля поста, комментарии)."""
+        if not isinstance(record, dict):
+            raise SkipRecord('ожидался объект')
+        if not record.get('author') or not record.get('text'):
+            raise SkipRecord('нет автора или текста')
+        comments = record.get('comments') or []
+        if not isinstance(comments, list) or not all(
+                isinstance(comment, dict) for comment in comments):
+            raise SkipRecord('comments должен быть списком объектов')
+        fields = {
+            'text': record['text'],
+            'pub_date': parse_date(record.get('pub_date')),
+            'image': record.get('image') or None,
+            'comments_count': len(comments),
+        }
+        # комментарий без даты получает дату поста
+        comments = [
+            (comment.get('author'), {
+                'text': comment.get('text'),
+                'created': (parse_date(comment['created'])
+                            if comment.get('created')
+                            else fields['pub_date']),
+            })
+            for comment in comments
+        ]
+        if any(not author or not comment_fields['text']
+               for author, comment_fields in comments):
+            raise SkipRecord('комментарий без автора или текста')
+        return record['author'], record.get('group') or None, fields, comments
+
+    def load_missing(self, rows):
+        """Создает неизвестных авторов и группы, если это разрешено."""
+        if self.create_authors:
+            missing = {
+                name
+                for _, author, _, _, comments in rows
+                for name in [author, *(name for name, _ in comments)]
+            } - self.authors.keys()
+            password = make_password(None)
+            User.objects.bulk_create(
+                [User(username=name, password=password) for name in missing],
+                ignore_conflicts=True)
+            self.authors.update(User.objects.filter(
+                username__in=missing).values_list('username', 'id'))
+        if self.create_groups:
+            missing = {group for _, _, group, _, _ in rows} - {None}
+            missing -= self.groups.keys()
+            Group.objects.bulk_create(
+                [Group(slug=slug, title=slug) for slug in missing],
+                ignore_conflicts=True)
+            self.groups.update(Group.objects.filter(
+                slug__in=missing).values_list('slug', 'id'))
+
+    def build(self, rows):
+        """Собирает посты и комментарии, подставляя id по справочникам."""
+        objects = []
+        for line_number, author, group, fields, comments in rows:
+            names = [author, *(name for name, _ in comments)]
+            unknown = [name for name in names if name not in self.authors]
+            if unknown:
+                self.skip(line_number, f'неизвестный автор {unknown[0]!r}')
+                continue
+            if group is not None and group not in self.groups:
+                self.skip(line_number, f'неизвестная группа {group!r}')
+                continue
+            post = Post(
+                author_id=self.authors[author],
+                group_id=self.groups[group] if group else None,
+                **fields,
+            )
+            objects.append((post, [
+                Comment(author_id=self.authors[name], **comment_fields)
+                for name, comment_fields in comments
+            ]))
+        return objects
+
+    # id постов восстанавливаются под блокировкой записи (bulk_insert)
+    @write_transaction()
+    def import_batch(self, batch):
+        rows = []
+        for line_number, record in batch:
+            try:
+                rows.append((line_number, *self.prepare(record)))
+            except SkipRecord as error:
+                self.skip(line_number, error)
+        self.load_missing(rows)
+        rows = self.build(rows)
+        if not rows:
+            return
+        post_ids = bulk_insert(Post, [post for post, _ in rows])
+        comments = []
+        for post_id, (_, post_comments) in zip(post_ids, rows):
+            for comment in post_comments:
+                comment.post_id = post_id
+                comments.append(comment)
+        Comment.objects.bulk_create(comments)
+        # сигналы при bulk_create не срабатывают: ленты подписчиков и
+        # статистику авторов обновляем один раз на пачку, а
+        # comments_count уже заполнен при подготовке постов
+        fan_out_posts(post_ids)
+        recount_stats({post.author_id for post, _ in rows})
+        self.totals['posts'] += len(post_ids)
+        self.totals['comments'] += len(comments)
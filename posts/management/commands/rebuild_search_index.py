@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.search import (
+    fts_available, rebuild_comment_index, rebuild_index,
+)
+
+
+class Command(BaseCommand):
+    help = ('Заново заполняет полнотекстовые индексы постов и '
+            'комментариев (FTS5)')
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        indexed = rebuild_index()
+        comments = rebuild_comment_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс пересобран, постов: {indexed}, '
+            f'комментариев: {comments}'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import rebuild_timelines
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок с нуля'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='id пользователя, чью ленту нужно пересобрать '
+                 '(можно указать несколько раз)')
+
+    def handle(self, *args, **options):
+        created = rebuild_timelines(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Лента пересобрана, записей: {created}'))
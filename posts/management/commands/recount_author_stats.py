@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.stats import recount_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики подписчиков, подписок и записей авторов'
+
+    def handle(self, *args, **options):
+        updated = recount_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счетчики пересчитаны, авторов: {updated}'))
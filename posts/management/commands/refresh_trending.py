@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Состаривает оценки популярных постов и удаляет устаревшие; '
+            'запускается по расписанию, например раз в несколько минут')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='пересчитать оценки с нуля по недавним комментариям '
+                 '(после загрузки комментариев в обход сигналов)')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            total = trending.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Оценки пересчитаны, постов: {total}'))
+            return
+        updated, deleted = trending.decay()
+        self.stdout.write(self.style.SUCCESS(
+            f'Оценки состарены: {updated}, удалено: {deleted}'))
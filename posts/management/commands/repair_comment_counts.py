@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import repair_comments_count
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики комментариев всех постов'
+
+    def handle(self, *args, **options):
+        updated = repair_comments_count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счетчики пересчитаны, постов: {updated}'))
@@ -0,0 +1,179 @@
+import io
+import random
+import time
+from bisect import bisect
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from mixer.backend.django import mixer
+from PIL import Image
+
+from posts.bulk import batched, keep_auto_now_add, refresh_derived_data
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными: пользователи, группы, '
+            'посты (с картинками и без), комментарии и подписки, '
+            'распределенные по степенному закону')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument(
+            '--image-share', type=float, default=0.1,
+            help='доля постов с картинкой')
+        parser.add_argument(
+            '--images', type=int, default=8,
+            help='сколько различных картинок сгенерировать')
+        parser.add_argument(
+            '--alpha', type=float, default=1.2,
+            help='показатель степенного закона популярности авторов')
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='за сколько дней распределить даты публикаций')
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+        users = self.create_users(options['users'], options['prefix'])
+        groups = self.create_groups(options['groups'], options['prefix'])
+        # популярность авторов: вес i-го автора пропорционален 1 / i^alpha
+        self.random.shuffle(users)
+        weights = [1 / (rank ** options['alpha'])
+                   for rank in range(1, len(users) + 1)]
+        self.popular = list(accumulate(weights))
+        images = self.create_images(options['images'], options['prefix'])
+        posts = self.create_posts(
+            options['posts'], users, groups, images,
+            options['image_share'], options['days'])
+        self.create_comments(options['comments'], users, posts)
+        self.create_follows(options['follows'], users)
+        self.stdout.write('Пересчет лент и счетчиков...')
+        refresh_derived_data()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с'))
+
+    def bulk_create(self, model, objects, **kwargs):
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
+
+    def popular_user(self, users):
+        point = self.random.random() * self.popular[-1]
+        return users[bisect(self.popular, point)]
+
+    def create_users(self, count, prefix):
+        password = make_password(None)
+        users = (User(username=f'{prefix}-user-{i}',
+                      first_name=mixer.faker.first_name(),
+                      last_name=mixer.faker.last_name(),
+                      password=password)
+                 for i in range(count))
+        self.bulk_create(User, users, ignore_conflicts=True)
+        users = list(User.objects.filter(
+            username__startswith=f'{prefix}-user-').values_list(
+            'id', flat=True))
+        self.stdout.write(f'Пользователей: {len(users)}')
+        return users
+
+    def create_groups(self, count, prefix):
+        existing = Group.objects.filter(slug__startswith=f'{prefix}-').count()
+        for i in range(existing, count):
+            mixer.blend(
+                Group,
+                title=mixer.faker.sentence(nb_words=3),
+                slug=f'{prefix}-group-{i}',
+            )
+        groups = list(Group.objects.filter(
+            slug__startswith=f'{prefix}-').values_list('id', flat=True))
+        self.stdout.write(f'Групп: {len(groups)}')
+        return groups
+
+    def create_images(self, count, prefix):
+        storage = Post._meta.get_field('image').storage
+        names = []
+        for i in range(count):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (1200, 900), color).save(buffer, 'JPEG')
+            names.append(storage.save(
+                f'posts/{prefix}-{i}.jpg', ContentFile(buffer.getvalue())))
+        return names
+
+    def create_posts(self, count, users, groups, images, image_share, days):
+        now = timezone.now()
+        last_id = Post.objects.order_by('-id').values_list(
+            'id', flat=True).first() or 0
+
+        def posts():
+            for _ in range(count):
+                yield Post(
+                    text=mixer.faker.text(max_nb_chars=400),
+                    author_id=self.popular_user(users),
+                    group_id=(self.random.choice(groups)
+                              if groups and self.random.random() < 0.5
+                              else None),
+                    image=(self.random.choice(images)
+                           if images and self.random.random() < image_share
+                           else None),
+                    pub_date=now - timedelta(
+                        seconds=self.random.randrange(days * 86400)),
+                )
+
+        with keep_auto_now_add(Post):
+            self.bulk_create(Post, posts())
+        # sqlite не возвращает id из bulk_create, забираем их отдельно
+        created = list(Post.objects.filter(id__gt=last_id).values_list(
+            'id', 'pub_date'))
+        self.stdout.write(f'Постов: {len(created)}')
+        return created
+
+    def create_comments(self, count, users, posts):
+        if not posts:
+            return
+        now = timezone.now()
+
+        def comments():
+            for _ in range(count):
+                post_id, pub_date = self.random.choice(posts)
+                age = max(int((now - pub_date).total_seconds()), 1)
+                yield Comment(
+                    text=mixer.faker.sentence(),
+                    post_id=post_id,
+                    author_id=self.random.choice(users),
+                    created=pub_date + timedelta(
+                        seconds=self.random.randrange(age)),
+                )
+
+        with keep_auto_now_add(Comment):
+            self.bulk_create(Comment, comments())
+        self.stdout.write(f'Комментариев: {count}')
+
+    def create_follows(self, count, users):
+        # подписчик выбирается равномерно, автор - по степенному закону,
+        # поэтому у немногих авторов оказывается большинство подписчиков
+        edges = set()
+        attempts = 0
+        while len(edges) < count and attempts < count * 10:
+            attempts += 1
+            user = self.random.choice(users)
+            author = self.popular_user(users)
+            if user != author:
+                edges.add((user, author))
+        follows = (Follow(user_id=user, author_id=author)
+                   for user, author in edges)
+        self.bulk_create(Follow, follows, ignore_conflicts=True)
+        self.stdout.write(f'Подписок: {len(edges)}')
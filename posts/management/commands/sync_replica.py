@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Обновляет локальные реплики SQLite копией основной базы '
+            '(online backup API), однократно или каждые --interval секунд')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='aliases',
+            help='алиас реплики, можно несколько; по умолчанию все')
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='повторять синхронизацию с этим интервалом, секунд')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or [
+            alias for alias in connections if alias != DEFAULT_DB_ALIAS]
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Локальные реплики есть только для SQLite')
+        for alias in aliases:
+            if alias not in connections:
+                raise CommandError(f'Нет базы {alias}')
+            if self.target(alias) == source.settings_dict['NAME']:
+                raise CommandError(f'{alias} указывает на основную базу')
+        while True:
+            for alias in aliases:
+                started = time.perf_counter()
+                self.sync(source, self.target(alias))
+                self.stdout.write(
+                    f'{alias}: {time.perf_counter() - started:.2f} с')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def target(self, alias):
+        return connections[alias].settings_dict['NAME']
+
+    def sync(self, source, path):
+        """Копирует базу во временный файл и атомарно подменяет реплику.
+
+        Читатели реплики продолжают работать со старым файлом, пока не
+        переоткроют соединение, и никогда не видят недописанную копию.
+        """
+        source.ensure_connection()
+        temp_path = f'{path}.sync'
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        copy = sqlite3.connect(temp_path)
+        try:
+            source.connection.backup(copy)
+            # копия из WAL-базы осталась бы в WAL-режиме, а ее -wal файл
+            # не переживет подмену основного файла
+            copy.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            copy.close()
+        os.replace(temp_path, path)
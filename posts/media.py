@@ -0,0 +1,57 @@
+"""Учет ссылок на картинки постов.
+
+Один файл в ContentAddressedStorage может принадлежать нескольким
+постам, поэтому при удалении поста или замене картинки файл удаляется
+только тогда, когда на него не осталось ссылок. Счетчиком служит сама
+таблица постов: проверка идет по индексу на Post.image.
+"""
+from django.db import transaction
+from sorl.thumbnail import delete as delete_thumbnails
+
+from .db import write_transaction
+from .models import Post
+from .thumbnails import post_image
+
+
+def is_referenced(name):
+    return Post.objects.filter(image=name).exists()
+
+
+def delete_image(name):
+    """Удаляет файл вместе с его превью и записями sorl."""
+    delete_thumbnails(post_image(name))
+
+
+def delete_unreferenced(name):
+    """Удаляет файл, если на него нет ссылок; возвращает, удален ли он.
+
+    Проверка и удаление идут под блокировкой записи: пока они не
+    закончились, ни один пост со ссылкой на файл не будет записан.
+    """
+    with write_transaction():
+        if is_referenced(name):
+            return False
+        delete_image(name)
+        return True
+
+
+def release(name):
+    """Удаляет файл после фиксации транзакции, если он больше не нужен.
+
+    Проверка выполняется после коммита, чтобы не удалить файл, на
+    который в той же транзакции сослался другой пост.
+    """
+    if name:
+        transaction.on_commit(lambda: delete_unreferenced(name))
+
+
+def ensure_stored(image):
+    """Записывает заново файл новой картинки, если его уже удалили.
+
+    Хранилище не пишет файл, который уже есть, и delete_unreferenced
+    может удалить его между этой проверкой и записью строки поста.
+    Вызывается после записи строки: с ней транзакция держит блокировку
+    записи, и следующее удаление увидит ссылку.
+    """
+    if image and not image.storage.exists(image.name):
+        image.storage.save(image.name, image.file)
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.6 on 2026-10-18 16:46
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comments_count(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Post = apps.get_model('posts', 'Post')
+    counts = (Comment.objects.filter(post=OuterRef('pk')).order_by()
+              .values('post').annotate(total=Count('id')).values('total'))
+    Post.objects.update(comments_count=Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comments_count, migrations.RunPython.noop),
+    ]
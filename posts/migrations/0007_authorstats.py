@@ -0,0 +1,58 @@
+# Generated by Django 2.2.6 on 2026-10-18 16:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_stats(apps, schema_editor):
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    def count(model, field):
+        counts = (model.objects.filter(**{field: OuterRef('pk')})
+                  .order_by().values(field)
+                  .annotate(total=Count('pk')).values('total'))
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    # Django 2.2 не урезает явный batch_size до лимитов SQLite:
+    # 500 частей составного SELECT и 999 параметров (по 4 на строку)
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk)
+         for pk in User.objects.values_list('pk', flat=True).iterator()),
+        batch_size=200,
+    )
+    AuthorStats.objects.update(
+        followers_count=count(Follow, 'author'),
+        following_count=count(Follow, 'user'),
+        posts_count=count(Post, 'author'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0006_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Полнотекстовый индекс постов на SQLite FTS5.
+# Таблица posts_post_fts хранит текст поста и название группы
+# (rowid совпадает с id поста) и поддерживается триггерами.
+
+from django.db import migrations
+
+FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts
+    USING fts5(text, group_title, tokenize = 'unicode61')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, text, group_title)
+        VALUES (new.id, new.text, COALESCE(
+            (SELECT title FROM posts_group WHERE id = new.group_id), ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+    AFTER UPDATE OF text, group_id ON posts_post BEGIN
+        DELETE FROM posts_post_fts WHERE rowid = old.id;
+        INSERT INTO posts_post_fts(rowid, text, group_title)
+        VALUES (new.id, new.text, COALESCE(
+            (SELECT title FROM posts_group WHERE id = new.group_id), ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+    AFTER DELETE ON posts_post BEGIN
+        DELETE FROM posts_post_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_group_fts_update
+    AFTER UPDATE OF title ON posts_group BEGIN
+        UPDATE posts_post_fts SET group_title = new.title
+        WHERE rowid IN (SELECT id FROM posts_post WHERE group_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO posts_post_fts(rowid, text, group_title)
+    SELECT p.id, p.text, COALESCE(g.title, '')
+    FROM posts_post p LEFT JOIN posts_group g ON g.id = p.group_id
+    """,
+]
+
+BACKWARD = [
+    'DROP TRIGGER IF EXISTS posts_group_fts_update',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+    'DROP TABLE IF EXISTS posts_post_fts',
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # на других СУБД поиск откатывается на LIKE
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(FORWARD), run_on_sqlite(BACKWARD)),
+    ]
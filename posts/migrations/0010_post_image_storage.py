@@ -0,0 +1,27 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:06
+
+from django.db import migrations, models
+import posts.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_fts'),
+    ]
+
+    # смена хранилища не меняет схему, а AlterField на SQLite пересоздает
+    # таблицу и теряет триггеры полнотекстового индекса из 0009
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='post',
+                name='image',
+                field=models.ImageField(blank=True, null=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/'),
+            ),
+        ]),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['image'], name='post_image_idx'),
+        ),
+    ]
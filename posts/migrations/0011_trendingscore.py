@@ -0,0 +1,29 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('score', models.FloatField(default=0, verbose_name='Оценка')),
+            ],
+            options={
+                'verbose_name': 'Оценка популярности',
+                'verbose_name_plural': 'Оценки популярности',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['-score', '-post'], name='trending_score_idx'),
+        ),
+    ]
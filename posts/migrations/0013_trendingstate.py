@@ -0,0 +1,24 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('decayed_at', models.DateTimeField(null=True, verbose_name='Время последнего затухания')),
+            ],
+            options={
+                'verbose_name': 'Состояние оценок популярности',
+                'verbose_name_plural': 'Состояние оценок популярности',
+            },
+        ),
+    ]
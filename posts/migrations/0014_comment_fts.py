@@ -0,0 +1,63 @@
+# Полнотекстовый индекс комментариев на SQLite FTS5 для поиска в админке.
+# Таблица posts_comment_fts хранит текст комментария (rowid совпадает с
+# id комментария) и поддерживается триггерами.
+
+from django.db import migrations
+
+FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_comment_fts
+    USING fts5(text, tokenize = 'unicode61')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_comment_fts_insert
+    AFTER INSERT ON posts_comment BEGIN
+        INSERT INTO posts_comment_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_comment_fts_update
+    AFTER UPDATE OF text ON posts_comment BEGIN
+        DELETE FROM posts_comment_fts WHERE rowid = old.id;
+        INSERT INTO posts_comment_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_comment_fts_delete
+    AFTER DELETE ON posts_comment BEGIN
+        DELETE FROM posts_comment_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    INSERT INTO posts_comment_fts(rowid, text)
+    SELECT id, text FROM posts_comment
+    """,
+]
+
+BACKWARD = [
+    'DROP TRIGGER IF EXISTS posts_comment_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_comment_fts_update',
+    'DROP TRIGGER IF EXISTS posts_comment_fts_insert',
+    'DROP TABLE IF EXISTS posts_comment_fts',
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # на других СУБД комментарии ищутся через LIKE
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_trendingstate'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(FORWARD), run_on_sqlite(BACKWARD)),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.6 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_comment_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowChange',
+            fields=[
+                ('user_id', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='id пользователя')),
+                ('changed', models.DateTimeField(verbose_name='Время изменения')),
+            ],
+            options={
+                'verbose_name': 'Изменение подписок',
+                'verbose_name_plural': 'Изменения подписок',
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -49,15 +50,39 @@ class Post(models.Model):
         null=True,
         verbose_name='Группа',
         help_text='Укажите группу пользователей')
+    # одинаковые картинки хранятся одним файлом
     image = models.ImageField(
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
         null=True)
+    # денормализованный счетчик, поддерживается сигналами Comment
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев')
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # индексы под ленты: фильтр по автору или группе
+        # и сортировка по убыванию даты
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_pub_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_pub_date_idx'),
+            models.Index(
+                fields=['-pub_date', 'id'],
+                name='post_pub_date_id_idx'),
+            # проверка, ссылается ли еще какой-нибудь пост на файл
+            models.Index(
+                fields=['image'],
+                name='post_image_idx'),
+        ]
 
     def __str__(self):
         # изменено строковое представление группы,
@@ -94,6 +119,11 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'),
+        ]
 
 
 class Follow(models.Model):
@@ -116,3 +146,192 @@ class Follow(models.Model):
                 fields=['user', 'author'],
                 name='unique follow')
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Счетчики автора для карточки профиля.
+
+    Поддерживаются сигналами Follow и Post, поэтому карточка читает
+    одну строку вместо трех COUNT по большим таблицам.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор')
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков')
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Записей')
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'Статистика {self.user_id}'
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя.
+
+    Строки создаются при публикации поста (для всех подписчиков автора)
+    и при подписке на автора, поэтому follow_index читает уже
+    отсортированную ленту одного пользователя по индексу.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель ленты')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост')
+    # автор и дата продублированы из поста, чтобы отписка и сортировка
+    # обходились без join с таблицей постов
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста')
+    pub_date = models.DateTimeField(verbose_name='Дата поста')
+
+    class Meta:
+        ordering = ('-pub_date', '-post_id')
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique timeline entry')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx'),
+        ]
+
+
+class TrendingScore(models.Model):
+    """Оценка популярности поста для ленты trending.
+
+    Каждый новый комментарий прибавляет к оценке единицу, а команда
+    refresh_trending периодически умножает все оценки на общий
+    множитель затухания и удаляет ставшие пренебрежимыми. Лента читает
+    лучшие посты по индексу оценки, не группируя комментарии.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост')
+    score = models.FloatField(default=0, verbose_name='Оценка')
+
+    class Meta:
+        verbose_name = 'Оценка популярности'
+        verbose_name_plural = 'Оценки популярности'
+        indexes = [
+            models.Index(
+                fields=['-score', '-post'],
+                name='trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'Оценка поста {self.post_id}: {self.score:.2f}'
+
+
+class TrendingState(models.Model):
+    """Состояние оценок популярности: одна строка на базу.
+
+    decayed_at - время последнего затухания оценок, от него считается
+    множитель следующего (posts.trending.decay). Хранится в базе, а не
+    в кэше, чтобы не потеряться при очистке или вытеснении кэша.
+    """
+    decayed_at = models.DateTimeField(
+        null=True,
+        verbose_name='Время последнего затухания')
+
+    class Meta:
+        verbose_name = 'Состояние оценок популярности'
+        verbose_name_plural = 'Состояние оценок популярности'
+
+    def __str__(self):
+        return f'Затухание: {self.decayed_at}'
+
+
+class FollowSuggestion(models.Model):
+    """Готовая рекомендация «на кого подписаться».
+
+    Строки пересчитываются пакетно командой recommend_follows
+    (posts.recommendations), а виджет читает несколько лучших
+    рекомендаций пользователя одним запросом по индексу.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+        verbose_name='Кому рекомендуется')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор')
+    score = models.FloatField(verbose_name='Оценка')
+    mutual = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписаны из ваших подписок')
+
+    class Meta:
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique follow suggestion')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='suggestion_user_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}: {self.score:.2f}'
+
+
+class FollowChange(models.Model):
+    """Пользователь, чьи подписки изменились после расчета рекомендаций.
+
+    Строку ставит сигнал подписки, а убирает пересчет рекомендаций
+    этого пользователя (recommend_follows --changed). Внешнего ключа
+    нет: подписки удаляются и вместе с пользователем, а отметка о
+    нем просто уберется следующим пересчетом.
+    """
+    user_id = models.PositiveIntegerField(
+        primary_key=True,
+        verbose_name='id пользователя')
+    changed = models.DateTimeField(verbose_name='Время изменения')
+
+    class Meta:
+        verbose_name = 'Изменение подписок'
+        verbose_name_plural = 'Изменения подписок'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.changed}'
@@ -0,0 +1,184 @@
+"""Пагинация лент постов.
+
+Помимо классического Paginator (номера страниц, COUNT(*) и OFFSET)
+поддерживается курсорный режим: страница выбирается по ключу
+(pub_date, id) последней или первой записи соседней страницы, поэтому
+глубокие страницы стоят столько же, сколько первая.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import Paginator
+from django.db.models import Max, Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+NUMBERED = 'numbered'
+CURSOR = 'cursor'
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа в непрозрачный токен для URL."""
+    raw = json.dumps([
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен; для испорченного токена возвращает None."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        date, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        date = parse_datetime(date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if date is None:
+        return None
+    return date, pk
+
+
+class CursorPage:
+    """Страница курсорной пагинации.
+
+    Повторяет ту часть интерфейса django.core.paginator.Page, которой
+    пользуются шаблоны и тесты: итерацию, len, индексацию и has_*.
+    """
+    cursor_mode = True
+
+    def __init__(self, object_list, keys, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # токены считаем сразу: вьюха может подменить object_list
+        self.next_cursor = self.previous_cursor = None
+        if object_list:
+            self.next_cursor = encode_cursor(
+                [getattr(object_list[-1], key) for key in keys])
+            self.previous_cursor = encode_cursor(
+                [getattr(object_list[0], key) for key in keys])
+
+    def __repr__(self):
+        return f'<CursorPage: {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class CursorPaginator:
+    """Keyset-пагинатор для выборок, упорядоченных по убыванию ключа.
+
+    keys -- пара полей (дата, id), по которой однозначно упорядочена
+    выборка; для неё должен существовать индекс.
+    """
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.keys = keys
+
+    def _after(self, date, pk):
+        date_key, pk_key = self.keys
+        return (Q(**{f'{date_key}__lt': date})
+                | Q(**{date_key: date, f'{pk_key}__lt': pk}))
+
+    def _before(self, date, pk):
+        date_key, pk_key = self.keys
+        return (Q(**{f'{date_key}__gt': date})
+                | Q(**{date_key: date, f'{pk_key}__gt': pk}))
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед before.
+
+        Без курсоров (или с испорченным токеном) отдается первая страница.
+        """
+        date_key, pk_key = self.keys
+        descending = self.object_list.order_by(
+            f'-{date_key}', f'-{pk_key}')
+        cursor = decode_cursor(before) if before else None
+        if cursor is not None:
+            rows = list(self.object_list.filter(self._before(*cursor))
+                        .order_by(date_key, pk_key)[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return CursorPage(rows, self.keys, True, has_previous)
+        cursor = decode_cursor(after) if after else None
+        if cursor is not None:
+            descending = descending.filter(self._after(*cursor))
+        rows = list(descending[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(
+            rows[:self.per_page], self.keys, has_next, cursor is not None)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для списков админки по большим таблицам.
+
+    Без фильтров число строк оценивается по наибольшему id (один
+    переход по B-дереву первичного ключа вместо COUNT(*) по всей
+    таблице). Пока id не больше ADMIN_COUNT_LIMIT, строки дешевле
+    посчитать точно; дальше удаленные строки завышают оценку, и она
+    уточняется по первой неполной странице. С фильтрами считается не
+    больше ADMIN_COUNT_LIMIT строк.
+    """
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        if queryset.query.where:
+            return queryset[:settings.ADMIN_COUNT_LIMIT].count()
+        last = queryset.aggregate(last=Max('pk'))['last'] or 0
+        if last <= settings.ADMIN_COUNT_LIMIT:
+            return queryset.count()
+        self.estimated = True
+        return last
+
+    def page(self, number):
+        page = super().page(number)
+        shown = len(page.object_list)
+        if self.estimated and shown < self.per_page:
+            # строки кончились раньше оценки: эта страница последняя
+            self.count = (page.number - 1) * self.per_page + shown
+            self.__dict__.pop('num_pages', None)
+            self.__dict__.pop('page_range', None)
+        return page
+
+
+def paginate(request, object_list, feed, keys=('pub_date', 'id')):
+    """Возвращает страницу ленты feed в режиме из FEED_PAGINATION.
+
+    Курсорный режим нужен выборке, упорядоченной по keys; готовый
+    список (например, id популярных постов) листается только по номерам.
+    """
+    mode = settings.FEED_PAGINATION.get(feed, NUMBERED)
+    if mode == CURSOR:
+        if not isinstance(object_list, QuerySet):
+            raise ImproperlyConfigured(
+                f'FEED_PAGINATION: лента {feed!r} поддерживает только '
+                f'режим {NUMBERED!r}')
+        paginator = CursorPaginator(
+            object_list, settings.NUM_OBJECTS_PER_PAGE, keys)
+        return paginator.get_page(
+            request.GET.get('after'), request.GET.get('before'))
+    paginator = Paginator(object_list, settings.NUM_OBJECTS_PER_PAGE)
+    return paginator.get_page(request.GET.get('page'))
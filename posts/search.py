@@ -0,0 +1,141 @@
+"""Полнотекстовый поиск по постам.
+
+На SQLite поиск идет по виртуальной таблице FTS5 posts_post_fts
+(см. миграцию 0009_post_fts), на других СУБД -- через LIKE. Текст
+комментариев для админки индексирует posts_comment_fts (0014_comment_fts).
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+COMMENT_FTS_TABLE = 'posts_comment_fts'
+# служебные символы, которыми snippet() обрамляет совпадения;
+# заменяются на <mark> уже после экранирования текста
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_WORDS = 16
+TOKEN = re.compile(r'\w+')
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match(query):
+    """Превращает пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово берется в кавычки (операторы FTS5 не работают)
+    и ищется по префиксу; слова объединяются через AND.
+    """
+    tokens = TOKEN.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def highlight(snippet):
+    return mark_safe(escape(snippet).replace(
+        MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def matching_ids(query, table=FTS_TABLE):
+    """Выражение для фильтра pk__in по совпадениям в индексе table."""
+    return RawSQL(
+        f'SELECT rowid FROM {table} WHERE {table} MATCH %s',
+        (build_match(query),))
+
+
+class SearchResults:
+    """Ранжированные результаты поиска, совместимые с Paginator.
+
+    Paginator вызывает count() и берет срез; на каждый срез выполняется
+    один запрос к индексу и один запрос за постами с авторами и группами.
+    """
+
+    def __init__(self, query):
+        self.match = build_match(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s', [self.match])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        limit = -1 if key.stop is None else max(key.stop - start, 0)
+        if not self.match or limit == 0:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 1.0, 0.5) LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, '…', SNIPPET_WORDS,
+                 self.match, limit, start])
+            rows = cursor.fetchall()
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [pk for pk, _ in rows])
+        results = []
+        for pk, snippet in rows:
+            post = posts.get(pk)
+            if post is not None:
+                post.snippet = highlight(snippet)
+                results.append(post)
+        return results
+
+
+def like_search(query):
+    """Запасной вариант поиска без FTS5: LIKE по тексту поста."""
+    posts = Post.objects.select_related('author', 'group')
+    for token in TOKEN.findall(query):
+        posts = posts.filter(text__icontains=token)
+    return posts
+
+
+def search_posts(query):
+    """Возвращает последовательность постов, подходящих под запрос."""
+    if fts_available():
+        return SearchResults(query)
+    if not TOKEN.search(query):
+        return Post.objects.none()
+    return like_search(query)
+
+
+def rebuild_index():
+    """Заново заполняет FTS-индекс по таблице постов."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, text, group_title) '
+            'SELECT p.id, p.text, COALESCE(g.title, \'\') '
+            'FROM posts_post p LEFT JOIN posts_group g ON g.id = p.group_id')
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) "
+                       "VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def rebuild_comment_index():
+    """Заново заполняет FTS-индекс по таблице комментариев."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {COMMENT_FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {COMMENT_FTS_TABLE}(rowid, text) '
+            'SELECT id, text FROM posts_comment')
+        cursor.execute(f"INSERT INTO {COMMENT_FTS_TABLE}({COMMENT_FTS_TABLE}) "
+                       "VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {COMMENT_FTS_TABLE}')
+        return cursor.fetchone()[0]
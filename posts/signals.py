@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (
+    counters, follow_graph, groups, media, recommendations, timeline,
+    trending, versions,
+)
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+from .stats import change_stats
+
+
+@receiver(pre_save, sender=Post)
+def post_image_replaced(sender, instance, update_fields=None, **kwargs):
+    if instance.image and not instance.image._committed:
+        # файл запишется при сохранении, post_saved проверит, что он есть
+        instance._new_image = instance.image
+    if instance.pk is None or instance._state.adding or (
+            update_fields is not None and 'image' not in update_fields):
+        return
+    old_image = Post.objects.filter(pk=instance.pk).values_list(
+        'image', flat=True).first()
+    if old_image and old_image != instance.image.name:
+        # освобождается в post_save, когда строка уже не ссылается на файл
+        instance._replaced_image = old_image
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    versions.bump('post', instance.id)
+    media.ensure_stored(instance.__dict__.pop('_new_image', None))
+    media.release(instance.__dict__.pop('_replaced_image', None))
+    if created:
+        change_stats(instance.author_id, posts_count=1)
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    versions.bump('post', instance.id)
+    change_stats(instance.author_id, posts_count=-1)
+    media.release(instance.image.name)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        change_stats(instance.author_id, followers_count=1)
+        change_stats(instance.user_id, following_count=1)
+        timeline.backfill_follow(instance)
+        follow_graph.changed(instance)
+        recommendations.mark_changed(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_stats(instance.author_id, followers_count=-1)
+    change_stats(instance.user_id, following_count=-1)
+    timeline.prune_follow(instance)
+    follow_graph.changed(instance)
+    recommendations.mark_changed(instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+        trending.record_comment(instance.post_id, instance.created)
+    versions.bump('post', instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments_count(instance.post_id, -1)
+    trending.forget_comment(instance.post_id, instance.created)
+    versions.bump('post', instance.post_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    versions.bump('group', instance.id)
+    groups.invalidate()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created and not kwargs.get('raw'):
+        AuthorStats.objects.create(user=instance)
+    # вход пользователя обновляет только last_login и не трогает карточки
+    if not created and (update_fields is None or 'username' in update_fields):
+        versions.bump('author', instance.id)
+
+
+def migrated(sender, **kwargs):
+    """Очищает общий кэш после migrate.
+
+    Кэш переживает перезапуски и пересоздание базы, а версии в нем
+    привязаны к id строк, которые в новой базе означают другие объекты.
+    """
+    cache.clear()
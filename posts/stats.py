@@ -0,0 +1,63 @@
+"""Счетчики авторов: подписчики, подписки и записи."""
+from django.db import router
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Follow, Post, User
+
+# Django 2.2 не урезает явный batch_size до лимитов SQLite: 500 частей
+# составного SELECT и 999 параметров (по 4 на строку)
+BATCH_SIZE = 200
+
+
+def _count(queryset, field):
+    counts = (queryset.filter(**{field: OuterRef('pk')}).order_by()
+              .values(field).annotate(total=Count('pk')).values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def change_stats(user_id, **deltas):
+    """Атомарно сдвигает счетчики автора, например posts_count=1.
+
+    Отсутствующая строка не создается: ее досчитает get_stats.
+    """
+    AuthorStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def recount_stats(user_ids=None):
+    """Пересчитывает счетчики одним UPDATE, создавая недостающие строки."""
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk)
+         for pk in users.values_list('pk', flat=True).iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    stats = AuthorStats.objects.all()
+    if user_ids is not None:
+        stats = stats.filter(user_id__in=user_ids)
+    # подзапросы коррелируются по user_id строки статистики
+    return stats.update(
+        followers_count=_count(Follow.objects, 'author'),
+        following_count=_count(Follow.objects, 'user'),
+        posts_count=_count(Post.objects, 'author'),
+    )
+
+
+def get_stats(user):
+    """Возвращает счетчики автора.
+
+    Если строка подгружена через select_related('stats'), запросов
+    не будет; при отсутствии строки она досчитывается и создается.
+    """
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        recount_stats([user.pk])
+        # строка только что создана: читаем ее из той же базы, куда писали
+        return AuthorStats.objects.db_manager(
+            router.db_for_write(AuthorStats)).get(user=user)
@@ -0,0 +1,67 @@
+"""Хранилище картинок постов с адресацией по содержимому.
+
+Файл сохраняется под именем из SHA-256 его содержимого
+('posts/ab/abcdef....jpg'), поэтому одинаковые картинки (репосты,
+повторная загрузка при правке) хранятся в одном экземпляре и делят
+одни и те же превью sorl. Удалением файлов, на которые больше не
+ссылается ни один пост, занимается posts.media. Файл пишется до
+фиксации транзакции поста; если она откатится, файл без ссылок
+удалит manage.py dedupe_media --delete-orphans.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CHUNK_SIZE = 64 * 1024
+
+
+def content_name(name, content):
+    """Имя файла по хэшу содержимого с сохранением каталога и расширения."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    digest = digest.hexdigest()
+    directory = os.path.dirname(name)
+    extension = os.path.splitext(name)[1].lower()
+    if os.path.basename(name) == digest + extension:
+        # имя уже построено по этому содержимому
+        return name
+    return '/'.join(
+        part for part in (directory, digest[:2], digest + extension) if part)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return self._save(content_name(name, content), content)
+
+    def _save(self, name, content):
+        # тот же хэш - то же содержимое: второй раз не записываем
+        if self.exists(name):
+            return name
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        # запись во временный файл и атомарное переименование: конкурентная
+        # загрузка того же содержимого просто перезапишет идентичный файл
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    output.write(chunk)
+            os.chmod(temp_path, self.file_permissions_mode or 0o644)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return name
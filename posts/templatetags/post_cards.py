@@ -0,0 +1,23 @@
+from django import template
+
+from posts.versions import card_objects, get_versions
+from yatube.routers import cache_alias
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card_version(post):
+    """Версия кэшированной карточки поста.
+
+    Меняется при правке поста, новых комментариях, переименовании
+    группы и смене имени автора.
+    """
+    return '.'.join(
+        str(version) for version in get_versions(*card_objects(post)))
+
+
+@register.simple_tag
+def post_card_cache():
+    """Алиас кэша для фрагментов страницы: с реплики - без записи."""
+    return cache_alias()
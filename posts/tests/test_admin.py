@@ -0,0 +1,155 @@
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, User
+from posts.paginators import EstimatedCountPaginator
+
+NUM_USERS = 30
+NUM_POSTS = 300
+NUM_COMMENTS = 600
+# сессия, пользователь, оценка числа строк и сама страница; точки
+# сохранения транзакции форм не считаются
+MAX_QUERIES = 4
+SAVEPOINTS = ('SAVEPOINT', 'RELEASE SAVEPOINT')
+MAX_SECONDS = 1.0
+# таблицы теста считаются большими, как на рабочей базе
+COUNT_LIMIT = 100
+PAGES = (
+    ('admin:posts_post_changelist', {}),
+    ('admin:posts_post_changelist', {'q': 'Пост'}),
+    ('admin:posts_comment_changelist', {}),
+    ('admin:posts_comment_changelist', {'q': 'user-1'}),
+    ('admin:posts_follow_changelist', {}),
+    ('admin:posts_follow_changelist', {'q': 'user-1'}),
+    ('admin:posts_post_add', {}),
+    ('admin:posts_comment_add', {}),
+)
+
+
+@override_settings(ADMIN_COUNT_LIMIT=COUNT_LIMIT)
+class AdminScaleTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        User.objects.bulk_create(
+            User(username=f'user-{number}') for number in range(NUM_USERS))
+        cls.users = list(User.objects.filter(username__startswith='user-'))
+        cls.seed(1)
+
+    @classmethod
+    def seed(cls, round_number):
+        users = cls.users
+        Post.objects.bulk_create(
+            Post(text=f'Пост {round_number}-{number}',
+                 author=users[number % NUM_USERS])
+            for number in range(NUM_POSTS))
+        posts = list(Post.objects.values_list('id', flat=True))
+        Comment.objects.bulk_create(
+            Comment(text='Комментарий', post_id=posts[number % len(posts)],
+                    author=users[number % NUM_USERS])
+            for number in range(NUM_COMMENTS))
+        Follow.objects.bulk_create(
+            (Follow(user=user, author=author)
+             for user in users for author in users[:round_number * 5]
+             if user != author),
+            ignore_conflicts=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def measure(self):
+        results = {}
+        for name, params in PAGES:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = self.client.get(reverse(name), params)
+                elapsed = time.perf_counter() - started
+            self.assertEqual(response.status_code, 200)
+            results[name, tuple(params.items())] = (
+                [query['sql'] for query in queries
+                 if not query['sql'].startswith(SAVEPOINTS)], elapsed)
+        return results
+
+    def test_pages_within_budget(self):
+        """Списки и формы админки укладываются в лимит запросов и времени"""
+        for (name, params), (queries, elapsed) in self.measure().items():
+            with self.subTest(page=name, params=params):
+                self.assertLessEqual(len(queries), MAX_QUERIES, queries)
+                self.assertLess(elapsed, MAX_SECONDS)
+                if not params:
+                    # без фильтра строки всей таблицы не пересчитываются
+                    self.assertFalse(
+                        [sql for sql in queries if 'COUNT(' in sql])
+
+    def test_queries_do_not_depend_on_data(self):
+        """Число запросов не растет вместе с таблицами"""
+        before = self.measure()
+        self.seed(2)
+        after = self.measure()
+        for page, (queries, _) in before.items():
+            with self.subTest(page=page):
+                self.assertEqual(len(after[page][0]), len(queries))
+
+    def test_follow_search_by_username(self):
+        """Поиск подписок находит точное имя и подписчика, и автора"""
+        response = self.client.get(
+            reverse('admin:posts_follow_changelist'), {'q': 'user-1'})
+        user = User.objects.get(username='user-1')
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            set(Follow.objects.filter(user=user))
+            | set(Follow.objects.filter(author=user)))
+
+    def test_comment_search_by_text(self):
+        """Поиск комментариев находит и слова текста, и точное имя автора"""
+        user = User.objects.get(username='user-1')
+        post = Post.objects.first()
+        wanted = Comment.objects.create(
+            text='Редкое слово', post=post, author=self.admin)
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'редкое'})
+        self.assertEqual(list(response.context['cl'].result_list), [wanted])
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'user-1'})
+        self.assertEqual(
+            set(response.context['cl'].result_list) - {wanted},
+            set(Comment.objects.filter(author=user)
+                .order_by('-pk')[:response.context['cl'].list_per_page]))
+
+
+class EstimatedCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        user = User.objects.create_user(username='author')
+        for number in range(30):
+            Post.objects.create(text=f'Пост {number}', author=user)
+        # удаленные строки оставляют дыры в id
+        Post.objects.filter(pk__in=Post.objects.order_by(
+            '-pk').values('pk')[:10]).delete()
+        Post.objects.create(text='Последний пост', author=user)
+
+    def paginator(self):
+        return EstimatedCountPaginator(Post.objects.order_by('id'), 10)
+
+    def test_small_table_counted_exactly(self):
+        """Пока id не больше ADMIN_COUNT_LIMIT, строки считаются точно"""
+        self.assertEqual(self.paginator().count, 21)
+
+    @override_settings(ADMIN_COUNT_LIMIT=10)
+    def test_estimate_trimmed_by_last_page(self):
+        """Неполная страница уточняет завышенную оценку"""
+        paginator = self.paginator()
+        self.assertGreater(paginator.count, 21)
+        self.assertEqual(len(paginator.page(3)), 1)
+        self.assertEqual(paginator.count, 21)
+        self.assertEqual(paginator.num_pages, 3)
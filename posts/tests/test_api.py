@@ -0,0 +1,95 @@
+import json
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import User, Group, Post, Comment, Follow
+
+SLUG = 'test-slug'
+MYNAME = 'MYNAME'
+MYFOLLOWER = 'MYFOLLOWER'
+POSTS = reverse('api_posts')
+GROUPS = reverse('api_groups')
+FOLLOWS = reverse('api_follows')
+POSTS_COUNT = 7
+
+
+@override_settings(API_PAGE_SIZE=3)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        cls.follower = User.objects.create_user(username=MYFOLLOWER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Тестовый текст {i}',
+                author=cls.user,
+                group=cls.group if i % 2 else None,
+            )
+            for i in range(POSTS_COUNT)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(
+            text='Ого', post=cls.post, author=cls.follower)
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get_all(self, url):
+        """Проходит все страницы по ссылкам next."""
+        results = []
+        while url:
+            data = json.loads(self.guest_client.get(url).content)
+            results += data['results']
+            url = data['next']
+        return results
+
+    def test_posts_cursor_pagination(self):
+        """Курсорные страницы покрывают все посты без повторов по порядку"""
+        ids = [post['id'] for post in self.get_all(POSTS)]
+        self.assertEqual(ids, [post.id for post in self.posts[::-1]])
+
+    def test_post_fields(self):
+        """Пост сериализуется с автором, группой и числом комментариев"""
+        data = json.loads(self.guest_client.get(
+            reverse('api_post', args=(self.post.id,))).content)
+        self.assertEqual(data['author'], MYNAME)
+        self.assertEqual(data['group'], None)
+        self.assertEqual(data['comments_count'], 1)
+
+    def test_filters(self):
+        """Посты фильтруются по группе, подписки по подписчику"""
+        posts = self.get_all(f'{POSTS}?group={SLUG}')
+        self.assertEqual(len(posts), POSTS_COUNT // 2)
+        self.assertEqual({post['group'] for post in posts}, {SLUG})
+        follows = self.get_all(f'{FOLLOWS}?user={MYFOLLOWER}')
+        self.assertEqual(
+            follows, [{'id': follows[0]['id'], 'user': MYFOLLOWER,
+                       'author': MYNAME}])
+        self.assertEqual(self.get_all(GROUPS)[0]['slug'], SLUG)
+        comments = self.get_all(
+            reverse('api_comments', args=(self.post.id,)))
+        self.assertEqual(comments[0]['author'], MYFOLLOWER)
+
+    def test_ndjson_export(self):
+        """Выгрузка NDJSON отдает все посты автора построчно"""
+        response = self.guest_client.get(
+            f'{POSTS}?author={MYNAME}&format=ndjson')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), POSTS_COUNT)
+        self.assertEqual(json.loads(lines[0])['author'], MYNAME)
+
+    def test_bad_limit(self):
+        """Неверный limit дает ошибку 400"""
+        for limit in ('x', '0', '1000'):
+            with self.subTest(limit=limit):
+                response = self.guest_client.get(f'{POSTS}?limit={limit}')
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import User, Group, Post, Comment
+
+SLUG = 'test-slug'
+MYNAME = 'MYNAME'
+GROUP = reverse('group_posts', args=(SLUG,))
+PROFILE = reverse('profile', args=(MYNAME,))
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_card_invalidated_on_changes(self):
+        """Кэш карточки сбрасывается при правке, комментарии и смене группы"""
+        self.assertContains(self.guest_client.get(GROUP), 'Тестовый текст')
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        self.assertContains(self.guest_client.get(GROUP), 'Исправленный')
+        Comment.objects.create(text='Ого', post=self.post, author=self.user)
+        self.assertContains(self.guest_client.get(GROUP), 'Комментариев: 1')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(
+            self.guest_client.get(GROUP), '#Новое название')
+
+    def test_edit_link_not_cached(self):
+        """Ссылка на редактирование не попадает в общий кэш"""
+        edit_url = reverse('post_edit', args=(MYNAME, self.post.id))
+        self.assertContains(self.authorized_client.get(PROFILE), edit_url)
+        self.assertNotContains(self.guest_client.get(PROFILE), edit_url)
+
+    def test_anonymous_post_page_cached(self):
+        """Страница поста для анонима берется из кэша до правки
+        или нового комментария"""
+        url = reverse('post', args=(MYNAME, self.post.id))
+        self.assertTemplateUsed(self.guest_client.get(url), 'post.html')
+        # остается только загрузка самого поста для ETag
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(url)
+        self.assertTemplateNotUsed(response, 'post.html')
+        self.assertContains(response, 'Тестовый текст')
+        self.assertTemplateUsed(
+            self.authorized_client.get(url), 'post.html')
+        Comment.objects.create(text='Ого', post=self.post, author=self.user)
+        self.assertContains(self.guest_client.get(url), 'Ого')
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        self.assertContains(self.guest_client.get(url), 'Исправленный')
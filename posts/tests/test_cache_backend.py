@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Post, User
+from posts.versions import get_versions
+from yatube.cache import SQLiteCache
+
+MYNAME = 'MYNAME'
+
+
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        options.setdefault('CULL_EVERY', 1)
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        """get/set/add/incr/delete работают как у стандартных бэкендов"""
+        backend = self.make_cache()
+        backend.set('key', {'value': 1})
+        self.assertEqual(backend.get('key'), {'value': 1})
+        self.assertFalse(backend.add('key', 'other'))
+        self.assertTrue(backend.add('counter', 1))
+        self.assertEqual(backend.incr('counter', 5), 6)
+        with self.assertRaises(ValueError):
+            backend.incr('missing')
+        self.assertEqual(
+            backend.get_many(['key', 'counter', 'missing']),
+            {'key': {'value': 1}, 'counter': 6})
+        backend.delete('key')
+        self.assertIsNone(backend.get('key'))
+
+    def test_expired_entries(self):
+        """Просроченная запись не читается и заменяется через add"""
+        backend = self.make_cache()
+        backend.set('key', 'value', timeout=0)
+        self.assertIsNone(backend.get('key'))
+        self.assertFalse(backend.has_key('key'))
+        self.assertTrue(backend.add('key', 'new'))
+        self.assertEqual(backend.get('key'), 'new')
+
+    def test_shared_between_instances(self):
+        """Записи и инвалидация видны всем процессам с тем же файлом"""
+        first, second = self.make_cache(), self.make_cache()
+        first.set('key', 'value')
+        self.assertEqual(second.get('key'), 'value')
+        second.delete('key')
+        self.assertIsNone(first.get('key'))
+
+    def test_lru_eviction(self):
+        """При переполнении удаляются давно не читавшиеся записи"""
+        backend = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for key in ('a', 'b', 'c'):
+            backend.set(key, key)
+        # время чтения обновляется с точностью до секунды
+        for key, age in (('a', 180), ('b', 120), ('c', 60)):
+            backend._db.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                (time.time() - age, backend.make_key(key)))
+        backend.get('a')
+        backend.set('d', 'd')
+        self.assertEqual(
+            set(backend.get_many(['a', 'b', 'c', 'd'])), {'a', 'c', 'd'})
+
+    def test_size_limit(self):
+        """Суммарный размер значений не превышает MAX_SIZE"""
+        backend = self.make_cache(MAX_SIZE=10_000)
+        for number in range(20):
+            backend.set(f'key{number}', b'x' * 1000)
+        size = backend._db.execute('SELECT total(size) FROM cache')
+        self.assertLessEqual(size.fetchone()[0], 10_000)
+        self.assertIsNotNone(backend.get('key19'))
+
+    def test_tests_use_own_file(self):
+        """Тесты не очищают кэш сервера из BASE_DIR"""
+        self.assertNotEqual(
+            os.path.dirname(cache._path), settings.BASE_DIR)
+
+
+class VersionInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=MYNAME)
+
+    def test_version_bumped_on_delete(self):
+        """Удаление поста меняет версию его ключей"""
+        post = Post.objects.create(text='Тестовый текст', author=self.user)
+        before = get_versions(('post', post.id))
+        post.delete()
+        self.assertNotEqual(before, get_versions(('post', post.id)))
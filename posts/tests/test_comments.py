@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+MYNAME = 'MYNAME'
+PER_PAGE = 5
+NUM_COMMENTS = 12
+
+
+@override_settings(COMMENTS_PER_PAGE=PER_PAGE)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        cls.post = Post.objects.create(text='Тестовый текст', author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {number}', post=cls.post,
+                    author=cls.user)
+            for number in range(NUM_COMMENTS)
+        )
+        cls.POST = reverse('post', args=(MYNAME, cls.post.id))
+        cls.COMMENTS = reverse('post_comments', args=(MYNAME, cls.post.id))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_page_shows_newest_comments(self):
+        """На странице поста первая страница комментариев, от новых"""
+        response = self.guest_client.get(self.POST)
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments],
+            [f'Комментарий {number}' for number in range(11, 6, -1)])
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, f'data-comments-url="{self.COMMENTS}')
+
+    def test_fragment_loads_older_comments(self):
+        """Фрагмент по курсору отдает более ранние комментарии до конца"""
+        page = self.guest_client.get(self.POST).context['comments']
+        texts = [comment.text for comment in page]
+        while page.has_next():
+            response = self.guest_client.get(
+                self.COMMENTS, {'after': page.next_cursor})
+            self.assertTemplateUsed(response, 'includes/comment_list.html')
+            page = response.context['comments']
+            texts += [comment.text for comment in page]
+        self.assertEqual(
+            texts, [f'Комментарий {number}'
+                    for number in range(NUM_COMMENTS - 1, -1, -1)])
+        self.assertNotContains(response, 'data-comments-url')
+
+    def test_fragment_checks_post(self):
+        """Фрагмент чужого или несуществующего поста отдает 404"""
+        User.objects.create_user(username='OTHER')
+        for args in (('OTHER', self.post.id), (MYNAME, self.post.id + 1)):
+            with self.subTest(args=args):
+                response = self.guest_client.get(
+                    reverse('post_comments', args=args))
+                self.assertEqual(response.status_code, 404)
+
+    def test_queries_do_not_depend_on_comments(self):
+        """Число запросов страницы поста не зависит от числа комментариев"""
+        counts = []
+        for _ in range(2):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.guest_client.get(self.POST)
+            counts.append(len(queries))
+            Comment.objects.bulk_create(
+                Comment(text='Еще', post=self.post, author=self.user)
+                for _ in range(NUM_COMMENTS))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_comment_submission_redirects(self):
+        """Комментарий сохраняется и браузер перенаправляется на пост"""
+        client = Client()
+        client.force_login(self.user)
+        add_comment = reverse('add_comment', args=(MYNAME, self.post.id))
+        for url in (add_comment, self.POST):
+            with self.subTest(url=url):
+                response = client.post(url, {'text': 'Новый комментарий'})
+                self.assertRedirects(response, self.POST)
+        self.assertEqual(
+            self.post.comments.filter(text='Новый комментарий').count(), 2)
+        response = client.post(add_comment, {'text': ''})
+        self.assertTemplateUsed(response, 'post.html')
+        self.assertTrue(response.context['form'].errors)
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import User, Group, Post, Comment, Follow
+
+SLUG = 'test-slug'
+MYNAME = 'MYNAME'
+READER = 'READER'
+MAIN = reverse('index')
+GROUP = reverse('group_posts', args=(SLUG,))
+PROFILE = reverse('profile', args=(MYNAME,))
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        cls.reader = User.objects.create_user(username=READER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.POST = reverse('post', args=(MYNAME, cls.post.id))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_not_modified_without_loading_posts(self):
+        """Неизменная страница отдается как 304 по ключевому запросу"""
+        # группа или автор, COUNT и ключи постов страницы
+        queries = {MAIN: 2, GROUP: 3, PROFILE: 3, self.POST: 1}
+        for url, count in queries.items():
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(count):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        """Правка поста, комментарий и новый пост дают полную страницу"""
+        changes = (
+            lambda: Post.objects.filter(id=self.post.id).first().save(),
+            lambda: Comment.objects.create(
+                text='Ого', post=self.post, author=self.reader),
+            lambda: Post.objects.create(text='Новый', author=self.user),
+        )
+        for change in changes:
+            etags = {url: self.guest_client.get(url)['ETag']
+                     for url in (MAIN, PROFILE, self.POST)}
+            change()
+            for url, etag in etags.items():
+                with self.subTest(url=url):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_reader(self):
+        """Гость и авторизованный пользователь получают разные ETag"""
+        self.assertNotEqual(
+            self.guest_client.get(PROFILE)['ETag'],
+            self.authorized_client.get(PROFILE)['ETag'],
+        )
+
+    def test_follow_invalidates_profile(self):
+        """Подписка меняет страницу профиля для подписчика"""
+        etag = self.authorized_client.get(PROFILE)['ETag']
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.authorized_client.get(
+            PROFILE, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_index_html_follows_posts_and_pages(self):
+        """Разметка главной меняется с новым постом и номером страницы"""
+        self.guest_client.get(MAIN)
+        Post.objects.create(text='Свежий пост', author=self.user)
+        response = self.guest_client.get(MAIN)
+        self.assertContains(response, 'Свежий пост')
+        for number in range(settings.NUM_OBJECTS_PER_PAGE):
+            Post.objects.create(text=f'Пост номер {number}', author=self.user)
+        first = self.guest_client.get(MAIN)
+        second = self.guest_client.get(MAIN, {'page': 2})
+        self.assertContains(first, 'Пост номер 9')
+        self.assertNotContains(first, 'Тестовый текст')
+        self.assertContains(second, 'Тестовый текст')
+        self.assertNotContains(second, 'Пост номер 9')
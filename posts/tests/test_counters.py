@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import AuthorStats, User, Post, Comment
+
+MYNAME = 'MYNAME'
+MAIN = reverse('index')
+
+
+class CommentsCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+        )
+        kwargs = {'username': MYNAME, 'post_id': cls.post.id}
+        cls.MYPOST_COMMENT = reverse('add_comment', kwargs=kwargs)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_counter_follows_comments(self):
+        """Счетчик растет при комментировании и падает при удалении"""
+        self.authorized_client.post(
+            self.MYPOST_COMMENT, data={'text': 'Комментарий'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        Comment.objects.get(post=self.post).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_repair_command(self):
+        """Команда repair_comment_counts исправляет счетчики"""
+        Comment.objects.create(text='Раз', post=self.post, author=self.user)
+        Post.objects.update(comments_count=42)
+        call_command('repair_comment_counts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_feed_queries_do_not_depend_on_comments(self):
+        """Число запросов ленты не зависит от числа постов с комментариями"""
+        def index_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(MAIN)
+            return len(queries)
+
+        Comment.objects.create(text='Раз', post=self.post, author=self.user)
+        before = index_queries()
+        for i in range(3):
+            post = Post.objects.create(text=f'Пост {i}', author=self.user)
+            Comment.objects.create(text='Два', post=post, author=self.user)
+        self.assertEqual(index_queries(), before)
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        cls.reader = User.objects.create_user(username='READER')
+        cls.PROFILE = reverse('profile', args=(MYNAME,))
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_stats_follow_posts_and_follows(self):
+        """Счетчики автора меняются вместе с постами и подписками"""
+        post = Post.objects.create(text='Текст', author=self.user)
+        self.reader_client.get(reverse('profile_follow', args=(MYNAME,)))
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+        self.assertEqual(self.stats(self.user).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        response = self.reader_client.get(self.PROFILE)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['stats'].followers_count, 1)
+        post.delete()
+        self.reader_client.get(reverse('profile_unfollow', args=(MYNAME,)))
+        stats = self.stats(self.user)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count), (0, 0))
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_missing_stats_recounted(self):
+        """Потерянная строка статистики досчитывается при просмотре"""
+        Post.objects.create(text='Текст', author=self.user)
+        AuthorStats.objects.filter(user=self.user).delete()
+        response = self.client.get(self.PROFILE)
+        self.assertEqual(response.context['stats'].posts_count, 1)
+        self.assertEqual(self.stats(self.user).posts_count, 1)
@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.db import OperationalError, connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from posts.db import write_transaction
+from posts.models import User, Post
+
+MYNAME = 'MYNAME'
+LOCKED = OperationalError('database is locked')
+
+
+@override_settings(WRITE_RETRY_ATTEMPTS=3, WRITE_RETRY_DELAY=0)
+class SQLiteWriteTests(TransactionTestCase):
+    # write_transaction сам открывает транзакцию, а TestCase уже внутри нее
+    def setUp(self):
+        self.user = User.objects.create_user(username=MYNAME)
+        self.calls = 0
+
+    def write(self, error=None):
+        """Пишет пост в write_transaction и при error падает."""
+        with write_transaction():
+            self.calls += 1
+            Post.objects.create(text='Тестовый текст', author=self.user)
+            if error is not None:
+                raise error
+
+    def begin_fails(self, fails):
+        """Первые fails попыток BEGIN падают на блокировке."""
+        begin = connection._start_transaction_under_autocommit
+        results = [LOCKED] * fails
+
+        def start():
+            if results:
+                raise results.pop()
+            begin()
+        return mock.patch.object(
+            connection, '_start_transaction_under_autocommit', start)
+
+    def test_pragmas_applied(self):
+        """Новое соединение настроено прагмами SQLITE_PRAGMAS"""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_begins_immediate(self):
+        """Транзакция записи начинается с BEGIN IMMEDIATE"""
+        with CaptureQueriesContext(connection) as queries:
+            self.write()
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Post.objects.exists()
+        self.assertEqual(queries[0]['sql'], 'BEGIN')
+
+    def test_locked_begin_retried(self):
+        """BEGIN, не получивший блокировку, повторяется до входа в блок"""
+        with self.begin_fails(2):
+            self.write()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_retries_bounded(self):
+        """После WRITE_RETRY_ATTEMPTS попыток ошибка передается дальше"""
+        with self.begin_fails(3), self.assertRaises(OperationalError):
+            self.write()
+        self.assertEqual(self.calls, 0)
+        self.assertFalse(connection.in_atomic_block)
+
+    def test_block_not_repeated(self):
+        """Ошибка внутри блока откатывает его, но блок не повторяется"""
+        with self.assertRaises(OperationalError):
+            self.write(error=LOCKED)
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(Post.objects.exists())
+
+    def test_nested_in_transaction(self):
+        """Внутри открытой транзакции блок работает как atomic()"""
+        with transaction.atomic():
+            self.write()
+            self.assertTrue(connection.in_atomic_block)
+        self.assertEqual(Post.objects.count(), 1)
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import Follow, Post, TimelineEntry, User
+
+MYNAME = 'MYNAME'
+READER = 'READER'
+
+
+class FollowGraphTests(TransactionTestCase):
+    # множества обновляются в колбэках on_commit, а TestCase их не вызывает
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=MYNAME)
+        self.reader = User.objects.create_user(username=READER)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_sets_reset_on_change(self):
+        """Подписка и отписка сбрасывают множество, оно читается заново"""
+        self.assertEqual(follow_graph.following(self.reader.id), set())
+        self.reader_client.get(reverse('profile_follow', args=(MYNAME,)))
+        self.assertEqual(
+            follow_graph.following(self.reader.id), {self.author.id})
+        with self.assertNumQueries(0):
+            follow_graph.following(self.reader.id)
+        self.reader_client.get(reverse('profile_unfollow', args=(MYNAME,)))
+        self.assertEqual(follow_graph.following(self.reader.id), set())
+
+    def test_profile_following_flag(self):
+        """Профиль берет признак подписки из графа"""
+        profile = reverse('profile', args=(MYNAME,))
+        self.assertFalse(self.reader_client.get(profile).context['following'])
+        self.reader_client.get(reverse('profile_follow', args=(MYNAME,)))
+        self.assertTrue(self.reader_client.get(profile).context['following'])
+
+    def test_fan_out_ignores_stale_cache(self):
+        """Пост раздается по таблице Follow, даже если граф устарел"""
+        follow_graph.following(self.reader.id)
+        # bulk_create не вызывает сигналы, закэшированное множество пусто
+        Follow.objects.bulk_create(
+            [Follow(user=self.reader, author=self.author)])
+        post = Post.objects.create(text='Тестовый текст', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
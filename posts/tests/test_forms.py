@@ -1,12 +1,16 @@
 # hw03_forms/posts/tests/test_forms.py
+import io
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
 
 from posts.models import User, Group, Post
 
@@ -17,6 +21,16 @@ MAIN_URL = reverse('index')
 GROUP_URL = reverse('group_posts', args=(SLUG,))
 NEW_POST_URL = reverse('new_post')
 TEST_TEXT = 'Изменим тестовый текст'
+# картинки хранятся под хэшем содержимого
+IMAGE_NAME = r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$'
+EXIF_ORIENTATION = 0x0112
+EXIF_MAKE = 0x010F
+
+
+def make_upload(name, size, image_format, **params):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format, **params)
+    return SimpleUploadedFile(name=name, content=buffer.getvalue())
 
 
 class PostCreateFormTests(TestCase):
@@ -91,7 +105,76 @@ class PostCreateFormTests(TestCase):
         self.assertEqual(new_obj.text, TEST_TEXT)
         self.assertEqual(new_obj.group, self.group)
         self.assertEqual(new_obj.author, self.user)
-        self.assertEqual(new_obj.image, 'posts/small.gif')
+        self.assertRegex(new_obj.image.name, IMAGE_NAME)
+
+    @override_settings(POST_THUMBNAIL_WORKERS=0)
+    def test_thumbnails_pregenerated(self):
+        """Превью картинки готовится при сохранении поста."""
+        image = SimpleUploadedFile(
+            name='thumb.gif',
+            content=(
+                b'\x47\x49\x46\x38\x39\x61\x02\x00'
+                b'\x01\x00\x80\x00\x00\x00\x00\x00'
+                b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+                b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+                b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+                b'\x0A\x00\x3B'
+            ),
+            content_type='image/gif'
+        )
+        self.authorized_client.post(
+            NEW_POST_URL,
+            data={'text': TEST_TEXT, 'image': image},
+        )
+        post = Post.objects.get(text=TEST_TEXT)
+        # готовое превью берется из хранилища ключей, картинка не читается
+        with mock.patch.object(default.engine, 'get_image') as get_image:
+            for geometry, options in settings.POST_THUMBNAILS:
+                self.assertTrue(
+                    get_thumbnail(post.image, geometry, **options).exists())
+        get_image.assert_not_called()
+
+    @override_settings(POST_THUMBNAIL_WORKERS=0)
+    def test_thumbnail_error_does_not_fail_post(self):
+        """Ошибка подготовки превью не мешает сохранить пост."""
+        with mock.patch('posts.thumbnails.generate',
+                        side_effect=OSError('broken image')), \
+                self.assertLogs('posts.thumbnails', 'ERROR'):
+            response = self.authorized_client.post(NEW_POST_URL, data={
+                'text': TEST_TEXT,
+                'image': make_upload('photo.jpeg', (10, 10), 'JPEG'),
+            })
+        self.assertRedirects(response, MAIN_URL)
+        self.assertTrue(Post.objects.filter(text=TEST_TEXT).exists())
+
+    @override_settings(POST_IMAGE_MAX_SIZE=100)
+    def test_image_downscaled_without_exif(self):
+        """Картинка уменьшается, поворачивается по EXIF и теряет EXIF."""
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = 6  # повернуть на 90 градусов
+        exif[EXIF_MAKE] = 'Камера'
+        self.authorized_client.post(NEW_POST_URL, data={
+            'text': TEST_TEXT,
+            'image': make_upload(
+                'photo.jpeg', (300, 200), 'JPEG', exif=exif.tobytes()),
+        })
+        post = Post.objects.get(text=TEST_TEXT)
+        self.assertRegex(post.image.name, IMAGE_NAME)
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (67, 100))
+            self.assertEqual(dict(image.getexif()), {})
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_image_too_large_rejected(self):
+        """Картинка со слишком большим числом пикселей отклоняется."""
+        response = self.authorized_client.post(NEW_POST_URL, data={
+            'text': TEST_TEXT,
+            'image': make_upload('big.png', (20, 20), 'PNG'),
+        })
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большое изображение: 20×20')
+        self.assertFalse(Post.objects.filter(text=TEST_TEXT).exists())
 
     def test_edit_post(self):
         """Валидная форма изменяет пост."""
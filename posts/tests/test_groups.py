@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+MYNAME = 'MYNAME'
+GROUPS = reverse('group_list')
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        cls.quiet = Group.objects.create(
+            title='Тихая группа', slug='quiet', description='Без постов')
+        cls.busy = Group.objects.create(
+            title='Активная группа', slug='busy', description='С постами')
+        for number in range(3):
+            cls.latest = Post.objects.create(
+                text=f'Пост {number}', author=cls.user, group=cls.busy)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_directory_lists_groups_with_stats(self):
+        """Каталог показывает все группы, число постов и последний пост"""
+        response = self.guest_client.get(GROUPS)
+        busy, quiet = response.context['groups']
+        self.assertEqual((busy, quiet), (self.busy, self.quiet))
+        self.assertEqual(busy.posts_count, 3)
+        self.assertEqual(busy.last_activity, self.latest.pub_date)
+        self.assertEqual(busy.latest_post, self.latest)
+        self.assertEqual(quiet.posts_count, 0)
+        self.assertIsNone(quiet.latest_post)
+        self.assertContains(response, reverse('group_posts', args=('quiet',)))
+
+    def test_directory_cached(self):
+        """Сводка берется из кэша и сбрасывается при изменении групп"""
+        self.guest_client.get(GROUPS)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(GROUPS)
+        self.assertEqual(len(response.context['groups']), 2)
+        Group.objects.create(title='Новая группа', slug='new')
+        response = self.guest_client.get(GROUPS)
+        self.assertEqual(len(response.context['groups']), 3)
@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.transaction import TransactionManagementError
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.bulk import bulk_insert
+from posts.models import (User, Group, Post, Follow, TimelineEntry,
+                          TrendingScore)
+
+SLUG = 'test-slug'
+MYNAME = 'MYNAME'
+MYFOLLOWER = 'MYFOLLOWER'
+PUB_DATE = '2015-03-01T12:00:00'
+RECORDS = [
+    {'author': MYNAME, 'group': SLUG, 'text': 'Первый', 'pub_date': PUB_DATE,
+     'comments': [{'author': MYFOLLOWER, 'text': 'Ого',
+                   'created': '2015-03-02T12:00:00'}]},
+    {'author': MYNAME, 'text': 'Второй', 'pub_date': '2015-03-03T12:00:00',
+     'comments': [{'author': MYFOLLOWER, 'text': 'Без даты'}]},
+    {'author': 'unknown', 'text': 'Чужой', 'pub_date': PUB_DATE},
+    {'author': MYNAME, 'text': 'Без даты'},
+]
+CSV = (
+    'author,group,text,pub_date\n'
+    f'{MYNAME},{SLUG},Из CSV,{PUB_DATE}\n'
+    f'{MYNAME},,"Текст, с запятой",{PUB_DATE}\n'
+)
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        cls.follower = User.objects.create_user(username=MYFOLLOWER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def import_file(self, name, content, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, name)
+            with open(path, 'w', encoding='utf-8') as source:
+                source.write(content)
+            output = StringIO()
+            call_command('import_posts', path, stdout=output, **options)
+        return output.getvalue()
+
+    def test_import_jsonl(self):
+        """Посты и комментарии загружаются пачками с исходными датами"""
+        output = self.import_file(
+            'posts.jsonl',
+            '\n'.join(json.dumps(record) for record in RECORDS),
+            batch_size=1,
+        )
+        self.assertIn('Постов: 2', output)
+        self.assertIn('пропущено: 2', output)
+        post = Post.objects.get(text='Первый')
+        self.assertEqual(post.pub_date, datetime(2015, 3, 1, 12))
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.comments.get().author, self.follower)
+        # комментарий без даты не отменяет загрузку поста
+        comment = Post.objects.get(text='Второй').comments.get()
+        self.assertEqual(comment.created, datetime(2015, 3, 3, 12))
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 2)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(), 2)
+
+    def test_non_string_dates_skipped(self):
+        """Дата-число в JSON пропускает запись, а не прерывает загрузку"""
+        records = [
+            {'author': MYNAME, 'text': 'Число', 'pub_date': 1425211200},
+            {'author': MYNAME, 'text': 'Комментарий', 'pub_date': PUB_DATE,
+             'comments': [{'author': MYFOLLOWER, 'text': 'Ого',
+                           'created': 1425211200}]},
+            {'author': MYNAME, 'text': 'Строка', 'pub_date': PUB_DATE},
+        ]
+        output = self.import_file(
+            'posts.jsonl', '\n'.join(json.dumps(record) for record in records))
+        self.assertIn('Постов: 1', output)
+        self.assertIn('пропущено: 2', output)
+        self.assertTrue(Post.objects.filter(text='Строка'))
+
+    def test_imported_comments_reach_trending(self):
+        """Недавние загруженные комментарии попадают в популярное"""
+        record = {
+            'author': MYNAME, 'text': 'Свежий',
+            'pub_date': timezone.now().isoformat(),
+            'comments': [{'author': MYFOLLOWER, 'text': 'Ого'}],
+        }
+        self.import_file('posts.jsonl', json.dumps(record))
+        self.assertTrue(TrendingScore.objects.filter(
+            post__text='Свежий'))
+
+    def test_import_csv_and_create_authors(self):
+        """CSV загружается, неизвестные авторы создаются по флагу"""
+        self.import_file('posts.csv', CSV)
+        self.assertEqual(
+            Post.objects.filter(text='Текст, с запятой').count(), 1)
+        self.import_file(
+            'posts.jsonl', json.dumps(RECORDS[2]), create_authors=True)
+        self.assertTrue(Post.objects.filter(author__username='unknown'))
+
+    def test_bulk_insert_requires_transaction(self):
+        """bulk_insert вне транзакции отказывается восстанавливать id"""
+        with mock.patch('posts.bulk.connections') as connections:
+            connections.__getitem__.return_value.in_atomic_block = False
+            with self.assertRaises(TransactionManagementError):
+                bulk_insert(Post, [Post(text='Текст', author=self.user)])
+        self.assertFalse(Post.objects.filter(text='Текст'))
+
+    def test_bulk_insert_returns_new_ids(self):
+        """bulk_insert возвращает id новых строк в порядке вставки"""
+        Post.objects.create(text='Удаленный', author=self.user).delete()
+        ids = bulk_insert(Post, [Post(text=f'Пост {number}', author=self.user)
+                                 for number in range(3)])
+        self.assertEqual(
+            [Post.objects.get(pk=pk).text for pk in ids],
+            ['Пост 0', 'Пост 1', 'Пост 2'])
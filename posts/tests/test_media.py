@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.template.defaultfilters import filesizeformat
+from django.test import TransactionTestCase, override_settings
+
+from posts.models import User, Post
+
+MYNAME = 'MYNAME'
+CONTENT = b'one image'
+
+
+class ContentAddressedMediaTests(TransactionTestCase):
+    # TestCase не выполняет колбэки on_commit, а файлы удаляются в них
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+        self.user = User.objects.create_user(username=MYNAME)
+        self.storage = Post._meta.get_field('image').storage
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_post(self, image_name):
+        return Post.objects.create(
+            text='Тестовый текст', author=self.user, image=image_name)
+
+    def test_identical_files_stored_once(self):
+        """Одинаковое содержимое хранится одним файлом до последней ссылки"""
+        names = {self.storage.save('posts/a.jpg', ContentFile(CONTENT)),
+                 self.storage.save('posts/b.jpg', ContentFile(CONTENT))}
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        first, second = self.create_post(name), self.create_post(name)
+        first.delete()
+        self.assertTrue(self.storage.exists(name))
+        second.delete()
+        self.assertFalse(self.storage.exists(name))
+
+    def test_replaced_image_released(self):
+        """Замененная картинка удаляется, если на нее нет ссылок"""
+        old = self.storage.save('posts/a.jpg', ContentFile(CONTENT))
+        post = self.create_post(old)
+        post.image = self.storage.save('posts/b.jpg', ContentFile(b'other'))
+        post.save()
+        self.assertFalse(self.storage.exists(old))
+
+    def test_blob_released_during_save_restored(self):
+        """Файл, удаленный между проверкой хранилища и записью поста,
+        записывается заново"""
+        name = self.storage.save('posts/a.jpg', ContentFile(CONTENT))
+        save = self.storage._save
+        released = []
+
+        def save_then_release(*args):
+            # хранилище видит файл и не пишет его, а конкурентное
+            # удаление последнего поста с ним успевает стереть файл
+            saved = save(*args)
+            if not released:
+                released.append(saved)
+                self.storage.delete(saved)
+            return saved
+        post = Post(text='Тестовый текст', author=self.user,
+                    image=ContentFile(CONTENT, name='b.jpg'))
+        with mock.patch.object(self.storage, '_save', save_then_release):
+            post.save()
+        self.assertEqual(post.image.name, name)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_dedupe_media(self):
+        """Команда переводит старые файлы на хэш и объединяет дубликаты"""
+        plain = FileSystemStorage()
+        for name in ('posts/a.jpg', 'posts/b.jpg'):
+            plain.save(name, ContentFile(CONTENT))
+            self.create_post(name)
+        output = StringIO()
+        call_command('dedupe_media', stdout=output)
+        self.assertIn('из них дубликатов: 1', output.getvalue())
+        # второй файл удален, первый переписан под новым именем
+        self.assertIn(f'Освобождено {filesizeformat(len(CONTENT))}',
+                      output.getvalue())
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertTrue(self.storage.exists(names.pop()))
+        self.assertFalse(plain.exists('posts/a.jpg'))
+        self.assertFalse(plain.exists('posts/b.jpg'))
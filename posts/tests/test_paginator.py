@@ -1,6 +1,6 @@
 # hw03_forms/posts/tests/test_paginator.py
 from django.conf import settings
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 
 from posts.models import User, Post
@@ -36,3 +36,37 @@ class PaginatorViewsTest(TestCase):
         response = self.client.get(MAIN + '?page=2')
         self.assertEqual(
             len(response.context.get('page').object_list), REMAINDER)
+
+
+@override_settings(FEED_PAGINATION={'index': 'cursor'})
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        for i in range(settings.NUM_OBJECTS_PER_PAGE + REMAINDER):
+            Post.objects.create(
+                text=f'Тестовый текст-{i}',
+                author=cls.user,
+            )
+
+    def test_cursor_pages_follow_each_other(self):
+        """Курсор ведет на следующую страницу и обратно"""
+        first = self.client.get(MAIN).context['page']
+        self.assertEqual(len(first), settings.NUM_OBJECTS_PER_PAGE)
+        self.assertTrue(first.has_next())
+        self.assertFalse(first.has_previous())
+        second = self.client.get(
+            MAIN + '?after=' + first.next_cursor).context['page']
+        self.assertEqual(len(second), REMAINDER)
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+        back = self.client.get(
+            MAIN + '?before=' + second.previous_cursor).context['page']
+        self.assertEqual(list(back), list(first))
+
+    def test_broken_cursor_shows_first_page(self):
+        """Испорченный токен открывает первую страницу"""
+        response = self.client.get(MAIN + '?after=broken')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page'].has_previous())
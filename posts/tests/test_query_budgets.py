@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import AuthorStats, Group, Post
+from yatube.middleware import fingerprint
+
+PAGE_SIZES = (5, 20)
+
+
+@override_settings(QUERY_STATS_HEADERS=True)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed_yatube', users=30, groups=3, posts=150, comments=300,
+            follows=150, images=0, seed=1, stdout=StringIO())
+        group = Group.objects.annotate(
+            posts_total=Count('posts')).order_by('-posts_total').first()
+        author = AuthorStats.objects.select_related('user').order_by(
+            '-posts_count').first().user
+        post = Post.objects.select_related('author').order_by(
+            '-comments_count').first()
+        cls.reader = AuthorStats.objects.select_related('user').order_by(
+            '-following_count').first().user
+        cls.urls = {
+            'index': reverse('index'),
+            'group_posts': reverse('group_posts', args=(group.slug,)),
+            'profile': reverse('profile', args=(author.username,)),
+            'post': reverse('post', args=(post.author.username, post.id)),
+            'post_comments': reverse(
+                'post_comments', args=(post.author.username, post.id)),
+            'follow_index': reverse('follow_index'),
+            'trending': reverse('trending'),
+            'group_list': reverse('group_list'),
+            'search': reverse('search') + '?q=a',
+            'api_posts': reverse('api_posts') + f'?group={group.slug}',
+            'api_comments': reverse('api_comments', args=(post.id,)),
+        }
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_all_budgets_checked(self):
+        """Для каждого лимита из QUERY_BUDGETS есть проверяемая страница"""
+        self.assertEqual(set(settings.QUERY_BUDGETS), set(self.urls))
+
+    def test_views_within_budget(self):
+        """Страницы укладываются в лимит запросов при любом размере страницы"""
+        for per_page in PAGE_SIZES:
+            for name, url in self.urls.items():
+                with self.subTest(view=name, per_page=per_page):
+                    cache.clear()
+                    with override_settings(NUM_OBJECTS_PER_PAGE=per_page,
+                                           COMMENTS_PER_PAGE=per_page):
+                        response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response['X-Query-View'], name)
+                    self.assertLessEqual(
+                        int(response['X-Query-Count']),
+                        settings.QUERY_BUDGETS[name],
+                        f'{url}: дублей {response["X-Query-Duplicates"]}',
+                    )
+
+    def test_fingerprint(self):
+        """Отпечаток запроса не зависит от значений и длины списка IN"""
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 10'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s) LIMIT 20'),
+        )
@@ -0,0 +1,85 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User, Group, Post, Comment, Follow
+
+SLUG = 'test-slug'
+MYNAME = 'MYNAME'
+NUM_AUTHORS = 5
+NUM_POSTS = 30
+
+# полный проход по таблице без индекса и сортировка во временном B-дереве
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+$')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+
+
+class QueryPlanTests(TestCase):
+    """Запросы лент не должны деградировать до полного сканирования."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.user = User.objects.create_user(username=MYNAME)
+        authors = [
+            User.objects.create_user(username=f'author-{i}')
+            for i in range(NUM_AUTHORS)
+        ]
+        for author in authors:
+            Follow.objects.create(user=cls.user, author=author)
+        for i in range(NUM_POSTS):
+            post = Post.objects.create(
+                text=f'Тестовый текст-{i}',
+                author=authors[i % NUM_AUTHORS],
+                group=cls.group if i % 2 else None,
+            )
+            Comment.objects.create(
+                text='Комментарий',
+                post=post,
+                author=cls.user,
+            )
+        cls.post = post
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы страниц используют индексы и не сортируют на лету"""
+        urls = [
+            reverse('index'),
+            reverse('group_posts', args=(SLUG,)),
+            reverse('group_list'),
+            reverse('profile', args=(self.post.author.username,)),
+            reverse('post', args=(self.post.author.username, self.post.id)),
+            reverse('post_comments',
+                    args=(self.post.author.username, self.post.id)),
+            reverse('follow_index'),
+            reverse('trending'),
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+            for query in queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT'):
+                    continue
+                for step in self.explain(sql):
+                    with self.subTest(url=url, sql=sql, step=step):
+                        self.assertIsNone(FULL_SCAN.match(step))
+                        self.assertIsNone(TEMP_SORT.search(step))
@@ -0,0 +1,118 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import recommendations
+from posts.models import Follow, FollowChange, FollowSuggestion, User
+
+# кто на кого подписан
+EDGES = {
+    'me': ('friend', 'other'),
+    'friend': ('popular', 'niche'),
+    'other': ('popular',),
+    'peer': ('friend', 'other', 'similar'),
+}
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        names = set(EDGES).union(*EDGES.values(), ['lonely'])
+        cls.users = {name: User.objects.create_user(username=name)
+                     for name in sorted(names)}
+        for user, authors in EDGES.items():
+            for author in authors:
+                Follow.objects.create(
+                    user=cls.users[user], author=cls.users[author])
+
+    def setUp(self):
+        cache.clear()
+        self.me = self.users['me']
+        self.client = Client()
+        self.client.force_login(self.me)
+
+    def suggested(self, name):
+        return [(suggestion.author.username, suggestion.mutual)
+                for suggestion in FollowSuggestion.objects.filter(
+                    user=self.users[name]).order_by('-score')]
+
+    def test_friends_of_friends_and_similar_readers(self):
+        """Друзья друзей идут по числу общих подписок, затем похожие"""
+        recommendations.refresh()
+        self.assertEqual(self.suggested('me'), [
+            ('popular', 2), ('niche', 1), ('similar', 0)])
+        self.assertEqual(self.suggested('lonely'), [])
+
+    def test_full_refresh_drops_stale_suggestions(self):
+        """Полный пересчет удаляет рекомендации без подписок"""
+        recommendations.refresh()
+        Follow.objects.filter(user=self.me).delete()
+        self.assertEqual(recommendations.refresh(), 4)
+        self.assertEqual(self.suggested('me'), [])
+
+    def test_incremental_refresh_recently_active(self):
+        """Частичный пересчет затрагивает только недавно входивших"""
+        since = timezone.now() - timedelta(hours=1)
+        active = recommendations.recently_active(since)
+        self.assertEqual(active, {self.me.id})
+        recommendations.refresh(active)
+        self.assertEqual(
+            set(FollowSuggestion.objects.values_list('user', flat=True)),
+            {self.me.id})
+
+    def test_refresh_changed_follows(self):
+        """Пересчет по изменившимся подпискам снимает их отметки"""
+        recommendations.refresh()
+        self.assertEqual(recommendations.changed_users(), set())
+        Follow.objects.create(user=self.me, author=self.users['popular'])
+        self.assertEqual(recommendations.changed_users(), {self.me.id})
+        recommendations.refresh(recommendations.changed_users())
+        self.assertNotIn('popular', dict(self.suggested('me')))
+        self.assertFalse(FollowChange.objects.exists())
+
+    def test_change_after_graph_load_kept(self):
+        """Изменение подписок после чтения графа ждет следующего пересчета"""
+        graph = recommendations.FollowGraph.load()
+        Follow.objects.filter(user=self.me).delete()
+        recommendations.refresh([self.me.id], graph)
+        self.assertIn(self.me.id, recommendations.changed_users())
+
+    def test_chunks(self):
+        """Кусок идет по возрастанию id и знает начало следующего"""
+        self.assertEqual(recommendations.chunk({9, 1, 5, 3}, 3, 2),
+                         ([3, 5], 9))
+        self.assertEqual(recommendations.chunk({9, 1}), ([1, 9], None))
+
+    def test_command_chunk(self):
+        """Команда с --limit пересчитывает кусок и подсказывает следующий"""
+        output = StringIO()
+        call_command('recommend_follows', users_from=self.me.id, limit=1,
+                     stdout=output)
+        self.assertIn('рекомендации для 1 пользователей', output.getvalue())
+        self.assertIn('Следующий кусок: --users-from', output.getvalue())
+        self.assertEqual(
+            set(FollowSuggestion.objects.values_list('user', flat=True)),
+            {self.me.id})
+
+    def test_widget(self):
+        """Виджет на профиле и в ленте подписок скрывает лишних авторов"""
+        recommendations.refresh()
+        profile = reverse('profile', args=('niche',))
+        response = self.client.get(profile)
+        self.assertEqual(
+            [item.author.username for item in response.context['suggestions']],
+            ['popular', 'similar'])
+        self.assertContains(
+            response, reverse('profile_follow', args=('popular',)))
+        self.client.get(reverse('profile_follow', args=('popular',)))
+        response = self.client.get(reverse('follow_index'))
+        self.assertEqual(
+            [item.author.username for item in response.context['suggestions']],
+            ['niche', 'similar'])
+        self.assertEqual(Client().get(profile).context['suggestions'], [])
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User, Post, AuthorStats
+from posts.templatetags.post_cards import post_card_version
+
+MYNAME = 'MYNAME'
+MAIN = reverse('index')
+PROFILE = reverse('profile', args=(MYNAME,))
+
+
+@override_settings(READ_REPLICAS=['replica'])
+class ReadReplicaTests(TransactionTestCase):
+    # реплика в тестах - зеркало основной базы, и видит она только
+    # зафиксированные данные, поэтому TestCase не подходит
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username=MYNAME)
+        self.post = Post.objects.create(
+            text='Тестовый текст', author=self.user)
+        self.guest_client = Client()
+
+    def get(self, client, url):
+        """Возвращает число запросов к основной базе и к реплике."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(primary), len(replica)
+
+    def test_anonymous_feeds_read_replica(self):
+        """Анонимные ленты и пост читаются с реплики"""
+        post_url = reverse('post', args=(MYNAME, self.post.id))
+        for url in (MAIN, PROFILE, post_url):
+            with self.subTest(url=url):
+                primary, replica = self.get(self.guest_client, url)
+                self.assertEqual(primary, 0)
+                self.assertGreater(replica, 0)
+
+    def test_authenticated_reads_primary(self):
+        """Авторизованный пользователь читает из основной базы"""
+        client = Client()
+        client.force_login(self.user)
+        self.assertEqual(self.get(client, MAIN)[1], 0)
+
+    def test_pinned_after_write(self):
+        """После запроса с записью клиент закреплен за основной базой"""
+        response = self.guest_client.post(reverse('new_post'))
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertEqual(self.get(self.guest_client, MAIN)[1], 0)
+
+    def test_reads_after_write_in_request(self):
+        """Чтение после записи в том же запросе идет в основную базу"""
+        AuthorStats.objects.filter(user=self.user).delete()
+        primary, _ = self.get(self.guest_client, PROFILE)
+        self.assertGreater(primary, 0)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).posts_count, 1)
+
+    def test_replica_reads_do_not_fill_shared_cache(self):
+        """Страница с реплики не пишет карточки и страницы в общий кэш"""
+        cache.clear()
+        card_key = make_template_fragment_key(
+            'post_card', [self.post.id, post_card_version(self.post)])
+        post_url = reverse('post', args=(MYNAME, self.post.id))
+        self.guest_client.get(MAIN)
+        response = self.guest_client.get(post_url)
+        self.assertIsNone(cache.get(card_key))
+        self.assertIsNone(cache.get(make_template_fragment_key('index_page')))
+        self.assertIsNone(cache.get(f'page:{response["ETag"]}'))
+        with self.settings(READ_REPLICAS=[]):
+            self.guest_client.get(MAIN)
+        self.assertIsNotNone(cache.get(card_key))
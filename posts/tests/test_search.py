@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, RequestFactory
+from django.urls import reverse
+
+from posts.admin import PostAdmin
+from posts.models import User, Group, Post
+from posts.search import FTS_TABLE
+
+SLUG = 'test-slug'
+SEARCH = reverse('search')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='MYNAME')
+        cls.group = Group.objects.create(
+            title='Котики',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.cats = Post.objects.create(
+            text='Сегодня кормили рыжего кота <script>',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.dogs = Post.objects.create(
+            text='Собака лает, караван идет',
+            author=cls.user,
+        )
+
+    def search(self, query):
+        response = Client().get(SEARCH, {'q': query})
+        return list(response.context['page'])
+
+    def test_search_finds_and_highlights(self):
+        """Поиск находит пост по префиксу слова и подсвечивает его"""
+        results = self.search('рыж')
+        self.assertEqual(results, [self.cats])
+        self.assertIn('<mark>рыжего</mark>', results[0].snippet)
+        self.assertNotIn('<script>', results[0].snippet)
+
+    def test_search_by_group_title_and_sync(self):
+        """Индекс следует за правкой поста и переименованием группы"""
+        self.assertEqual(self.search('котики'), [self.cats])
+        self.group.title = 'Кошки'
+        self.group.save()
+        self.assertEqual(self.search('кошки'), [self.cats])
+        self.dogs.text = 'Теперь про кошки'
+        self.dogs.save()
+        self.assertEqual(len(self.search('кошки')), 2)
+        self.assertEqual(self.search('караван'), [])
+
+    def test_fts_operators_are_ignored(self):
+        """Операторы FTS5 в запросе не ломают поиск"""
+        for query in ('"', 'NEAR(', 'кот OR', '*'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    Client().get(SEARCH, {'q': query}).status_code, 200)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идет через индекс"""
+        admin = PostAdmin(Post, site)
+        request = RequestFactory().get('/')
+        queryset, _ = admin.get_search_results(
+            request, Post.objects.all(), 'собака')
+        self.assertEqual(list(queryset), [self.dogs])
+
+    def test_admin_search_without_words(self):
+        """Запрос без слов в админке дает пустой список, а не ошибку"""
+        admin = PostAdmin(Post, site)
+        request = RequestFactory().get('/')
+        for query in ('!!', '***'):
+            with self.subTest(query=query):
+                queryset, _ = admin.get_search_results(
+                    request, Post.objects.all(), query)
+                self.assertEqual(list(queryset), [])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index восстанавливает индекс"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('собака'), [self.dogs])
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import User, Post, Follow, TimelineEntry
+
+AUTHOR = 'AUTHOR'
+READER = 'READER'
+FOLLOW = reverse('profile_follow', args=(AUTHOR,))
+UNFOLLOW = reverse('profile_unfollow', args=(AUTHOR,))
+FOLLOW_INDEX = reverse('follow_index')
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.reader = User.objects.create_user(username=READER)
+        cls.old_post = Post.objects.create(
+            text='Старый пост',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def timeline_posts(self):
+        return list(TimelineEntry.objects.filter(
+            user=self.reader).values_list('post_id', flat=True))
+
+    def test_follow_backfills_timeline(self):
+        """Подписка добавляет в ленту уже написанные посты автора"""
+        self.reader_client.get(FOLLOW)
+        self.assertEqual(self.timeline_posts(), [self.old_post.id])
+
+    def test_new_post_fanned_out(self):
+        """Новый пост попадает в ленты подписчиков первым"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(
+            self.timeline_posts(), [new_post.id, self.old_post.id])
+        response = self.reader_client.get(FOLLOW_INDEX)
+        self.assertEqual(response.context['page'][0], new_post)
+
+    def test_unfollow_and_delete_prune_timeline(self):
+        """Отписка и удаление поста очищают ленту"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Удаляемый пост', author=self.author)
+        post.delete()
+        self.assertEqual(self.timeline_posts(), [self.old_post.id])
+        self.reader_client.get(UNFOLLOW)
+        self.assertEqual(self.timeline_posts(), [])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_timelines восстанавливает ленты"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.timeline_posts(), [self.old_post.id])
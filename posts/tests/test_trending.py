@@ -0,0 +1,140 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Post, TrendingScore, TrendingState, User
+
+MYNAME = 'MYNAME'
+HALF_LIFE = 6 * 60 * 60
+TRENDING = reverse('trending')
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=MYNAME)
+        cls.quiet = Post.objects.create(text='Тихий пост', author=cls.user)
+        cls.hot = Post.objects.create(text='Обсуждаемый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(text='Комментарий', post=post,
+                                   author=self.user)
+
+    def test_comment_raises_score(self):
+        """До первого decay комментарий прибавляет к оценке единицу"""
+        self.comment(self.hot, 2)
+        self.assertEqual(TrendingScore.objects.get(post=self.hot).score, 2)
+        self.assertFalse(TrendingScore.objects.filter(post=self.quiet))
+
+    def test_feed_ordered_by_score(self):
+        """Лента показывает только обсуждаемые посты, от лучших"""
+        self.comment(self.quiet)
+        self.comment(self.hot, 3)
+        response = self.guest_client.get(TRENDING)
+        self.assertEqual(list(response.context['page']),
+                         [self.hot, self.quiet])
+
+    def test_decay_scales_and_prunes(self):
+        """decay умножает оценки на общий множитель и удаляет малые"""
+        self.comment(self.quiet)
+        self.comment(self.hot, 100)
+        TrendingState.objects.create(
+            pk=trending.STATE_ID,
+            decayed_at=timezone.now() - timedelta(hours=30))
+        # время прошлого decay не зависит от кэша
+        cache.clear()
+        with self.settings(TRENDING_HALF_LIFE=6 * 60 * 60):
+            updated, deleted = trending.decay()
+        self.assertEqual((updated, deleted), (2, 1))
+        score = TrendingScore.objects.get(post=self.hot).score
+        self.assertAlmostEqual(score, 100 / 2 ** 5, places=2)
+
+    def test_concurrent_decay_runs_once(self):
+        """decay, прочитавший устаревшее время, оценки не трогает"""
+        self.comment(self.hot, 4)
+        trending.decay()
+        stale = TrendingState.objects.get()
+        # другой процесс успел состарить оценки раньше
+        trending.decay()
+        with mock.patch.object(TrendingState.objects, 'get_or_create',
+                               return_value=(stale, False)):
+            self.assertEqual(trending.decay(), (0, 0))
+        self.assertAlmostEqual(
+            TrendingScore.objects.get(post=self.hot).score, 4, places=2)
+
+    @override_settings(TRENDING_HALF_LIFE=HALF_LIFE)
+    def test_fresh_comment_weighs_one_after_decay(self):
+        """Комментарий между decay после следующего decay весит единицу"""
+        TrendingState.objects.create(
+            pk=trending.STATE_ID,
+            decayed_at=timezone.now() - timedelta(seconds=HALF_LIFE))
+        self.comment(self.hot)
+        self.assertAlmostEqual(
+            TrendingScore.objects.get(post=self.hot).score, 2, places=2)
+        trending.decay()
+        self.assertAlmostEqual(
+            TrendingScore.objects.get(post=self.hot).score, 1, places=2)
+
+    @override_settings(TRENDING_HALF_LIFE=HALF_LIFE)
+    def test_deletion_keeps_other_comments_weight(self):
+        """Удаление комментария не отнимает вес других комментариев"""
+        TrendingState.objects.create(
+            pk=trending.STATE_ID,
+            decayed_at=timezone.now() - timedelta(seconds=HALF_LIFE))
+        self.comment(self.hot)
+        trending.decay()
+        old = self.hot.comments.get()
+        self.comment(self.hot)
+        old.delete()
+        self.assertAlmostEqual(
+            TrendingScore.objects.get(post=self.hot).score, 1, places=2)
+
+    @override_settings(FEED_PAGINATION={'trending': 'cursor'})
+    def test_cursor_mode_rejected(self):
+        """Курсорный режим для ленты популярного - ошибка настройки"""
+        with self.assertRaises(ImproperlyConfigured):
+            self.guest_client.get(TRENDING)
+
+    def test_comment_deletion_lowers_score(self):
+        """Удаление комментария вычитает его вес, последнего - удаляет"""
+        self.comment(self.hot, 2)
+        self.hot.comments.first().delete()
+        self.assertAlmostEqual(
+            TrendingScore.objects.get(post=self.hot).score, 1)
+        self.hot.comments.get().delete()
+        self.assertFalse(TrendingScore.objects.filter(post=self.hot))
+
+    def test_rebuild_matches_incremental(self):
+        """Пересчет с нуля дает те же оценки, что и счетчики"""
+        self.comment(self.quiet)
+        self.comment(self.hot, 3)
+        incremental = dict(TrendingScore.objects.values_list('post', 'score'))
+        self.assertEqual(trending.rebuild(), 2)
+        rebuilt = dict(TrendingScore.objects.values_list('post', 'score'))
+        self.assertEqual(rebuilt.keys(), incremental.keys())
+        for post_id, score in rebuilt.items():
+            self.assertAlmostEqual(score, incremental[post_id], places=2)
+
+    def test_queries_do_not_depend_on_comments(self):
+        """Число запросов ленты не зависит от числа комментариев"""
+        counts = []
+        for _ in range(2):
+            self.comment(self.hot, 10)
+            with CaptureQueriesContext(connection) as queries:
+                self.guest_client.get(TRENDING)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
@@ -134,27 +134,21 @@ class PostViewsTests(TestCase):
 
     # далее тесты к 6 спринту
     def test_main_page_cached(self):
-        """Главная страница кэшируется"""
-
-        key = make_template_fragment_key('index_page')
-        self.guest_client.get(MAIN)
+        """Главная страница кэшируется под своим ETag"""
+        etag = self.guest_client.get(MAIN)['ETag']
+        key = make_template_fragment_key('index_page', [etag])
         cache1 = cache.get(key)
+        self.assertIsNotNone(cache1)
+        self.assertEqual(self.guest_client.get(MAIN)['ETag'], etag)
+        self.assertEqual(cache.get(key), cache1)
         Post.objects.create(
             text='Новый текст',
             author=self.user,
         )
-        self.guest_client.get(MAIN)
-        cache2 = cache.get(key)
-        # проверяем равен ли кэш первого запроса
-        # кэшу второго запроса
-        self.assertEqual(cache1, cache2)
-        cache.clear()
-        self.guest_client.get(MAIN)
-        cache3 = cache.get(key)
-        # после очистки новый кэш содержит оба созданных поста
-        # и не равен предыдыщему кэшу
-        self.assertNotEqual(cache2, cache3)
-        cache.clear()
+        # новый пост дает новый ETag, а с ним и новый фрагмент
+        response = self.guest_client.get(MAIN)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Новый текст')
 
     def test_authorized_user_can_follow(self):
         """Авторизованный пользователь
@@ -0,0 +1,77 @@
+"""Заблаговременная подготовка превью картинок постов.
+
+Превью из POST_THUMBNAILS генерируются после сохранения поста в пуле
+фоновых потоков, поэтому тег {% thumbnail %} в шаблонах находит уже
+готовый файл в хранилище ключей sorl и не декодирует оригинал.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def post_image(name):
+    """Файл картинки поста с хранилищем поля Post.image.
+
+    sorl различает ключи превью по классу хранилища, поэтому превью
+    нужно строить через то же хранилище, что и тег {% thumbnail %}.
+    """
+    field = Post._meta.get_field('image')
+    return field.attr_class(None, field, name)
+
+
+def generate(name):
+    """Создает все настроенные превью для файла name из хранилища."""
+    for geometry, options in settings.POST_THUMBNAILS:
+        get_thumbnail(post_image(name), geometry, **options)
+
+
+def _generate_logged(name):
+    # превью не обязательны: тег {% thumbnail %} построит их при показе
+    try:
+        generate(name)
+    except Exception:
+        logger.exception('Не удалось подготовить превью для %s', name)
+
+
+def _generate_in_background(name):
+    try:
+        _generate_logged(name)
+    finally:
+        # у каждого потока свое соединение с базой (хранилище ключей sorl)
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.POST_THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def schedule(post):
+    """Ставит подготовку превью картинки поста в очередь.
+
+    Задача запускается после фиксации транзакции. При
+    POST_THUMBNAIL_WORKERS = 0 превью готовятся сразу, в текущем потоке.
+    Ошибка подготовки в обоих случаях только пишется в лог.
+    """
+    if not post.image:
+        return
+    name = post.image.name
+    if not settings.POST_THUMBNAIL_WORKERS:
+        _generate_logged(name)
+        return
+    transaction.on_commit(
+        lambda: _get_executor().submit(_generate_in_background, name))
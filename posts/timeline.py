@@ -0,0 +1,73 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Вместо join Follow x Post на каждый запрос follow_index каждому
+подписчику при публикации поста добавляется строка TimelineEntry.
+"""
+from django.db import connection, transaction
+
+from .models import Post, TimelineEntry
+
+COLUMNS = ('user_id', 'post_id', 'author_id', 'pub_date')
+
+
+def _copy_entries(**lookups):
+    """Заполняет ленты одним INSERT ... SELECT по join постов и подписок.
+
+    lookups фильтруют посты; пары (подписчик, пост) берутся через
+    author__following, уже существующие записи пропускаются.
+    Возвращает число вставленных строк.
+    """
+    select = Post.objects.filter(**lookups).order_by().values_list(
+        'author__following__user_id', 'id', 'author_id', 'pub_date')
+    sql, params = select.query.sql_with_params()
+    ops = connection.ops
+    columns = ', '.join(ops.quote_name(column) for column in COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{ops.quote_name(TimelineEntry._meta.db_table)} ({columns}) '
+            f'{sql} {ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            params,
+        )
+        return cursor.rowcount
+
+
+def fan_out_post(post):
+    """Раздает новый пост в ленты всех подписчиков автора."""
+    _copy_entries(id=post.id, author__following__isnull=False)
+
+
+def fan_out_posts(post_ids):
+    """Раздает подписчикам пачку постов, загруженных в обход сигналов."""
+    return _copy_entries(id__in=post_ids, author__following__isnull=False)
+
+
+def backfill_follow(follow):
+    """Добавляет в ленту подписчика все посты автора."""
+    _copy_entries(
+        author_id=follow.author_id,
+        author__following__user_id=follow.user_id,
+    )
+
+
+def prune_follow(follow):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id,
+        author_id=follow.author_id,
+    ).delete()
+
+
+@transaction.atomic
+def rebuild_timelines(user_ids=None):
+    """Пересобирает ленты с нуля.
+
+    Если передан список user_ids, пересобираются только их ленты.
+    Возвращает количество созданных записей.
+    """
+    entries = TimelineEntry.objects.all()
+    if user_ids is None:
+        entries.delete()
+        return _copy_entries(author__following__isnull=False)
+    entries.filter(user_id__in=user_ids).delete()
+    return _copy_entries(author__following__user_id__in=user_ids)
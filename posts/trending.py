@@ -0,0 +1,126 @@
+"""Популярные сейчас посты.
+
+Оценка поста - сумма комментариев, каждый из которых со временем
+теряет вес вдвое за TRENDING_HALF_LIFE секунд. decay периодически
+умножает все оценки на один общий множитель за прошедшее время: это
+один UPDATE без степеней в SQL. Поэтому оценки хранятся в масштабе
+момента последнего decay (TrendingState): комментарий, написанный
+после него, прибавляет не единицу, а 2 ** (t / TRENDING_HALF_LIFE),
+где t - время с decay (record_comment), и после следующего decay
+весит ровно столько, сколько должен. Удаление комментария вычитает
+его вес в том же масштабе (forget_comment). decay нужно вызывать
+регулярно, иначе веса новых комментариев растут без предела.
+Оценки ниже TRENDING_MIN_SCORE удаляются, так что таблица держит
+только недавно обсуждавшиеся посты, а лента читает ее по индексу
+(-score, -post).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Comment, TrendingScore, TrendingState
+
+# id единственной строки TrendingState
+STATE_ID = 1
+
+
+def weight(created):
+    """Вес комментария в масштабе оценок на момент последнего decay.
+
+    До первого decay оценки не состаривались, и вес равен единице.
+    """
+    decayed_at = TrendingState.objects.filter(pk=STATE_ID).values_list(
+        'decayed_at', flat=True).first()
+    if decayed_at is None:
+        return 1.0
+    return decay_factor((decayed_at - created).total_seconds())
+
+
+def record_comment(post_id, created):
+    """Прибавляет к оценке поста вес нового комментария."""
+    added = weight(created)
+    if not TrendingScore.objects.filter(post_id=post_id).update(
+            score=F('score') + added):
+        TrendingScore.objects.bulk_create(
+            [TrendingScore(post_id=post_id, score=added)],
+            ignore_conflicts=True)
+
+
+def forget_comment(post_id, created):
+    """Вычитает из оценки поста вес удаленного комментария.
+
+    Вес считается так же, как при record_comment, и с тех пор
+    состаривался вместе со всей оценкой, поэтому вес остальных
+    комментариев поста не затрагивается. Исключение - комментарии,
+    написанные до первого decay: они весят единицу, а вычитается
+    меньше, так что оценка остается чуть выше точной.
+    """
+    scores = TrendingScore.objects.filter(post_id=post_id)
+    if scores.update(score=F('score') - weight(created)):
+        scores.filter(score__lt=settings.TRENDING_MIN_SCORE).delete()
+
+
+def decay_factor(seconds):
+    return 0.5 ** (seconds / settings.TRENDING_HALF_LIFE)
+
+
+@transaction.atomic
+def decay():
+    """Состаривает оценки на время с прошлого вызова.
+
+    Возвращает пару (обновлено, удалено). Самый первый вызов только
+    запоминает время. Время переставляется условным UPDATE по
+    прочитанному значению, поэтому из двух одновременных вызовов
+    оценки состарит только один.
+    """
+    now = timezone.now()
+    state, _ = TrendingState.objects.get_or_create(pk=STATE_ID)
+    if not TrendingState.objects.filter(
+            pk=STATE_ID, decayed_at=state.decayed_at).update(decayed_at=now):
+        return 0, 0
+    updated = 0
+    if state.decayed_at is not None and now > state.decayed_at:
+        factor = decay_factor((now - state.decayed_at).total_seconds())
+        updated = TrendingScore.objects.update(score=F('score') * factor)
+    deleted, _ = TrendingScore.objects.filter(
+        score__lt=settings.TRENDING_MIN_SCORE).delete()
+    return updated, deleted
+
+
+@transaction.atomic
+def rebuild():
+    """Пересчитывает оценки с нуля по комментариям за TRENDING_WINDOW.
+
+    Нужен после загрузки комментариев в обход сигналов; возвращает
+    число постов с оценкой.
+    """
+    now = timezone.now()
+    scores = defaultdict(float)
+    comments = Comment.objects.filter(
+        created__gte=now - timedelta(seconds=settings.TRENDING_WINDOW),
+    ).values_list('post_id', 'created')
+    for post_id, created in comments.iterator():
+        scores[post_id] += decay_factor((now - created).total_seconds())
+    TrendingScore.objects.all().delete()
+    TrendingScore.objects.bulk_create(
+        TrendingScore(post_id=post_id, score=score)
+        for post_id, score in scores.items()
+        if score >= settings.TRENDING_MIN_SCORE)
+    TrendingState.objects.update_or_create(
+        pk=STATE_ID, defaults={'decayed_at': now})
+    return len(scores)
+
+
+def top_ids():
+    """id лучших TRENDING_SIZE постов по убыванию оценки.
+
+    Читается только индекс оценок; список достаточно короткий, чтобы
+    листать его в памяти без COUNT и OFFSET по таблице.
+    """
+    return list(TrendingScore.objects.order_by(
+        '-score', '-post_id',
+    ).values_list('post_id', flat=True)[:settings.TRENDING_SIZE])
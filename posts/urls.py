@@ -1,11 +1,14 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("",
          views.index,
          name="index"),
+    path("trending/",
+         views.trending_posts,
+         name="trending"),
     path("follow/",
          views.follow_index,
          name="follow_index"),
@@ -16,12 +19,33 @@ urlpatterns = [
     path("500/",
          views.server_error,
          name='500'),
+    path("groups/",
+         views.group_list,
+         name="group_list"),
     path("group/<slug:slug>/",
          views.group_posts,
          name="group_posts"),
     path("new/",
          views.new_post,
          name="new_post"),
+    path("search/",
+         views.search,
+         name="search"),
+    path("api/posts/",
+         api.post_list,
+         name="api_posts"),
+    path("api/posts/<int:post_id>/",
+         api.post_detail,
+         name="api_post"),
+    path("api/posts/<int:post_id>/comments/",
+         api.comment_list,
+         name="api_comments"),
+    path("api/groups/",
+         api.group_list,
+         name="api_groups"),
+    path("api/follows/",
+         api.follow_list,
+         name="api_follows"),
     path('<str:username>/<int:post_id>/',
          views.post_view,
          name='post'),
@@ -31,6 +55,9 @@ urlpatterns = [
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit,
          name='post_edit'),
+    path("<str:username>/<int:post_id>/comments/",
+         views.post_comments,
+         name="post_comments"),
     path("<str:username>/<int:post_id>/comment/",
          views.add_comment,
          name="add_comment"),
@@ -0,0 +1,62 @@
+"""Версии для ключей кэша.
+
+Версия объекта хранится в кэше под ключом 'version:<namespace>:<id>'.
+Сигналы моделей увеличивают ее при изменении объекта, после чего
+кэшированные фрагменты со старой версией в ключе просто перестают
+читаться и вытесняются по таймауту. Пространства: 'post', 'author' и
+'group'.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+PREFIX = 'version'
+
+
+def _key(namespace, pk):
+    return f'{PREFIX}:{namespace}:{pk}'
+
+
+def _new_version():
+    # при потере ключа версия начинается с текущего времени, а не с нуля,
+    # чтобы не совпасть с версией уже закэшированных фрагментов
+    return time.time_ns() // 1000
+
+
+def get_versions(*objects):
+    """Возвращает версии для пар (namespace, id) одним обращением к кэшу."""
+    keys = [_key(namespace, pk) for namespace, pk in objects]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def card_objects(post):
+    """Объекты, от которых зависит карточка поста: пост, автор и группа."""
+    objects = [('post', post.id), ('author', post.author_id)]
+    if post.group_id:
+        objects.append(('group', post.group_id))
+    return objects
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def bump(namespace, pk):
+    """Делает устаревшими все ключи, построенные на версии объекта.
+
+    Версия увеличивается сразу и еще раз после фиксации транзакции:
+    фрагмент, отрендеренный конкурентным запросом до коммита по старым
+    данным, но уже с новой версией, не переживет второго увеличения.
+    """
+    key = _key(namespace, pk)
+    _incr(key)
+    transaction.on_commit(lambda: _incr(key))
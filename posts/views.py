@@ -1,32 +1,85 @@
-from django.core.paginator import Paginator
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
+from django.utils.http import urlencode
 
+from . import follow_graph, groups, recommendations, trending
+from .conditional import (
+    KEY_FIELDS, cache_page, cached_page, load_posts, make_etag,
+    not_modified, page_validators, set_etag,
+)
+from .db import write_transaction
 from .forms import CommentForm, PostForm
-from .models import Follow, Post, Group
+from .models import Comment, Follow, Post, Group, TimelineEntry
+from .paginators import CursorPaginator, paginate
+from .search import search_posts
+from .thumbnails import schedule as schedule_thumbnails
+from .stats import get_stats
+from .versions import card_objects, get_versions
 
 
 def index(request):
-    post_list = Post.objects.select_related('author', 'group').all()
-    paginator = Paginator(post_list, settings.NUM_OBJECTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'index.html', {
+    # страница сначала выбирается по ключам: этого хватает для ETag,
+    # а полные посты загружаются, только если страница изменилась
+    page = paginate(request, Post.objects.only(*KEY_FIELDS), 'index')
+    etag = make_etag(request, *page_validators(page))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    load_posts(page, Post.objects.select_related('author', 'group'))
+    # ETag входит в ключ фрагмента: он меняется вместе со страницей,
+    # ее номером или курсором и читателем
+    return set_etag(render(request, 'index.html', {
         'page': page,
-    })
+        'etag': etag,
+    }), etag)
+
+
+def trending_posts(request):
+    # порядок берется из индекса оценок, без группировки комментариев
+    # (оценки поддерживает posts.trending), посты грузятся только для
+    # текущей страницы
+    page = paginate(request, trending.top_ids(), 'trending')
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        page.object_list)
+    page.object_list = [
+        posts[post_id] for post_id in page.object_list if post_id in posts]
+    return render(request, 'trending.html', {'page': page})
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, settings.NUM_OBJECTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'group.html', {
+    page = paginate(request, group.posts.only(*KEY_FIELDS), 'group_posts')
+    etag = make_etag(
+        request, get_versions(('group', group.id)), *page_validators(page))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    load_posts(page, group.posts.select_related('author'))
+    return set_etag(render(request, 'group.html', {
         'group': group,
         'page': page,
+    }), etag)
+
+
+def group_list(request):
+    return render(request, 'groups.html', {'groups': groups.directory()})
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(
+        search_posts(query) if query else [],
+        settings.NUM_OBJECTS_PER_PAGE,
+    )
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, 'search.html', {
+        'query': query,
+        'page': page,
+        'page_query': urlencode({'q': query}) + '&',
     })
 
 
@@ -40,43 +93,92 @@ def new_post(request):
         return render(request, 'new_post.html', {'form': form})
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    # пост и его раздача в ленты подписчиков сохраняются вместе
+    with write_transaction():
+        post.save()
+        schedule_thumbnails(post)
     return redirect('index')
 
 
+def load_post(username, post_id):
+    """Пост с автором, его счетчиками и группой одним запросом."""
+    return get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        author__username=username,
+        id=post_id,
+    )
+
+
+def render_post(request, post, form):
+    """Страница поста с первой страницей комментариев."""
+    return render(request, 'post.html', {
+        'form': form,
+        'author': post.author,
+        'stats': get_stats(post.author),
+        'following': follow_graph.is_following(request.user, post.author),
+        'post': post,
+        'comments': comment_page(request, post.id),
+    })
+
+
 @login_required
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
+    post = load_post(username, post_id)
     form = CommentForm(request.POST or None)
     if not form.is_valid():
-        return render(request, 'includes/comment.html', {'form': form})
+        return render_post(request, post, form)
     comment = form.save(commit=False)
     comment.author = request.user
     comment.post = post
-    comment.save()
+    # комментарий и счетчик comments_count сохраняются вместе
+    with write_transaction():
+        comment.save()
+    # post/redirect/get: страница поста строится только в GET
     return redirect('post', username, post.id)
 
 
+def comment_page(request, post_id):
+    """Страница комментариев поста, от новых к старым.
+
+    Более ранние комментарии подгружаются по курсору ?after=
+    через post_comments.
+    """
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.COMMENTS_PER_PAGE, keys=('created', 'id'))
+    return paginator.get_page(after=request.GET.get('after'))
+
+
+def post_comments(request, username, post_id):
+    """Фрагмент со следующей страницей комментариев поста."""
+    post = get_object_or_404(
+        Post.objects.only('id'), author__username=username, id=post_id)
+    # версия поста меняется с каждым новым комментарием
+    etag = make_etag(request, get_versions(('post', post.id)))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    return set_etag(render(request, 'includes/comment_list.html', {
+        'comments': comment_page(request, post.id),
+        'post_url': reverse('post', args=(username, post.id)),
+        'comments_url': request.path,
+    }), etag)
+
+
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
-    form = CommentForm(request.POST or None)
-    if not form.is_valid():
-        return render(request, 'post.html', {
-            'form': form,
-            'author': post.author,
-            'post': post,
-            'comments': post.comments.all(),
-        })
-    comment = form.save(commit=False)
-    comment.author = request.user
-    comment.post = post
-    comment.save()
-    return render(request, 'post.html', {
-        'form': form,
-        'author': post.author,
-        'post': post,
-        'comments': post.comments.all(),
-    })
+    if request.method == 'POST':
+        return add_comment(request, username, post_id)
+    post = load_post(username, post_id)
+    stats = get_stats(post.author)
+    following = follow_graph.is_following(request.user, post.author)
+    # версия поста меняется и при правке, и при новых комментариях
+    etag = make_etag(
+        request, get_versions(*card_objects(post)), following,
+        stats.followers_count, stats.following_count, stats.posts_count)
+    response = not_modified(request, etag) or cached_page(request, etag)
+    if response is not None:
+        return response
+    return cache_page(request, render_post(request, post, CommentForm()), etag)
 
 
 @login_required
@@ -98,48 +200,65 @@ def post_edit(request, username, post_id):
             'form': form,
             'post': post,
         })
-    form.save()
+    with write_transaction():
+        post = form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnails(post)
     return redirect('post', username, post.id)
 
 # далее все функции изменные в спринте 6
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    following = False
-    if request.user.is_authenticated:
-        if author.following.filter(
-            user=request.user,
-            author__username=username
-        ).count() != 0:
-            following = True
-    paginator = Paginator(author.posts.all(), settings.NUM_OBJECTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'profile.html', {
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    following = follow_graph.is_following(request.user, author)
+    stats = get_stats(author)
+    suggestions = recommendations.for_user(request.user, exclude=author)
+    page = paginate(request, author.posts.only(*KEY_FIELDS), 'profile')
+    etag = make_etag(
+        request, following, stats.followers_count, stats.following_count,
+        stats.posts_count,
+        [(item.author_id, item.mutual) for item in suggestions],
+        *page_validators(page))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    load_posts(page, author.posts.select_related('group'))
+    return set_etag(render(request, 'profile.html', {
         'author': author,
+        'stats': stats,
         'page': page,
-        'following': following
-    })
+        'following': following,
+        'suggestions': suggestions,
+    }), etag)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, settings.NUM_OBJECTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, "follow_index.html", {'page': page})
+    # лента читается из материализованных записей по индексу
+    # (user, -pub_date) без join с подписками
+    entries = TimelineEntry.objects.filter(
+        user=request.user).select_related('post__author', 'post__group')
+    page = paginate(
+        request, entries, 'follow_index', keys=('pub_date', 'post_id'))
+    page.object_list = [entry.post for entry in page.object_list]
+    return render(request, "follow_index.html", {
+        'page': page,
+        'suggestions': recommendations.for_user(request.user),
+    })
 
 
 @login_required
 def profile_follow(request, username):
     if not request.user.username == username:
         author_to_follow = get_object_or_404(User, username=username)
-        obj, created = Follow.objects.get_or_create(
-            user=request.user,
-            author=author_to_follow
-        )
+        # вместе с подпиской в ленту добавляются посты автора
+        with write_transaction():
+            obj, created = Follow.objects.get_or_create(
+                user=request.user,
+                author=author_to_follow
+            )
     return redirect('follow_index')
 
 
@@ -148,7 +267,9 @@ def profile_unfollow(request, username):
     unfollow = Follow.objects.filter(
         user=request.user,
         author__username=username)
-    unfollow.delete()
+    # удаление подписки убирает посты автора из ленты
+    with write_transaction():
+        unfollow.delete()
     return redirect('follow_index')
 
 
@@ -0,0 +1,19 @@
+"""Бэкенд SQLite, умеющий начинать транзакцию с BEGIN IMMEDIATE.
+
+Django всегда открывает транзакцию SQLite отложенным BEGIN, и
+блокировка записи берется только на первой изменяющей команде. Если
+транзакция до нее успела прочитать базу, а другое соединение за это
+время записало, SQLite сразу отвечает «database is locked», не
+дожидаясь busy_timeout. BEGIN IMMEDIATE берет блокировку сразу и ждет
+ее по busy_timeout. Им начинается транзакция, открытая при
+begin_immediate = True (см. posts.db.write_transaction).
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    begin_immediate = False
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(
+            'BEGIN IMMEDIATE' if self.begin_immediate else 'BEGIN')
@@ -0,0 +1,240 @@
+"""Общий для всех процессов сервера кэш в файле SQLite.
+
+В отличие от LocMemCache кэш один на хост: воркеры gunicorn видят
+записи и инвалидацию друг друга. Файл работает в режиме WAL, так что
+чтения не ждут записи. При переполнении по MAX_ENTRIES или MAX_SIZE
+(байт в сериализованных значениях) сначала удаляются просроченные
+записи, затем давно не читавшиеся (LRU).
+
+    CACHES = {'default': {
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 100000, 'MAX_SIZE': 256 * 2 ** 20},
+    }}
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+'''
+# время последнего чтения обновляется не чаще, чем раз в столько
+# секунд: для LRU такой точности хватает, а чтение не становится записью
+ACCESS_RESOLUTION = 1.0
+# ограничение SQLite на число параметров в запросе
+MAX_PARAMS = 900
+LIVE = '(expires IS NULL OR expires > ?)'
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_size = int(options.get('MAX_SIZE', 64 * 2 ** 20))
+        # как часто (раз в сколько записей процесса) проверять размер
+        self._cull_every = int(options.get('CULL_EVERY', 20))
+        self._writes = 0
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        """Соединение текущего потока; после fork открывается заново."""
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            connection = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode = wal')
+            connection.execute('PRAGMA synchronous = normal')
+            connection.executescript(SCHEMA)
+            self._local.connection, self._local.pid = connection, pid
+        return self._local.connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _row(self, key, value, timeout, now):
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return (key, blob, self.get_backend_timeout(timeout), now, len(blob))
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        names = {self._key(key, version): key for key in keys}
+        now = time.time()
+        found = {}
+        stale = []
+        items = list(names)
+        for start in range(0, len(items), MAX_PARAMS):
+            chunk = items[start:start + MAX_PARAMS]
+            rows = self._db.execute(
+                f'SELECT key, value, accessed FROM cache '
+                f'WHERE key IN ({", ".join("?" * len(chunk))}) AND {LIVE}',
+                (*chunk, now))
+            for name, value, accessed in rows:
+                found[names[name]] = pickle.loads(value)
+                if now - accessed > ACCESS_RESOLUTION:
+                    stale.append((now, name))
+        if stale:
+            self._db.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?', stale)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        rows = [self._row(self._key(key, version), value, timeout, now)
+                for key, value in data.items()]
+        with self._db:
+            self._db.execute('BEGIN IMMEDIATE')
+            self._db.executemany(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)', rows)
+        self._written(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        row = self._row(self._key(key, version), value, timeout, now)
+        # просроченную запись add заменяет, живую оставляет как есть
+        cursor = self._db.execute(
+            'INSERT INTO cache VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+            'expires = excluded.expires, accessed = excluded.accessed, '
+            'size = excluded.size '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (*row, now))
+        self._written(cursor.rowcount)
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {LIVE}',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()))
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        name = self._key(key, version)
+        with self._db:
+            self._db.execute('BEGIN IMMEDIATE')
+            row = self._db.execute(
+                f'SELECT value FROM cache WHERE key = ? AND {LIVE}',
+                (name, time.time())).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            self._db.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (blob, len(blob), name))
+        return value
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {LIVE}',
+            (self._key(key, version), time.time())).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        rows = [(self._key(key, version),) for key in keys]
+        with self._db:
+            self._db.execute('BEGIN IMMEDIATE')
+            self._db.executemany('DELETE FROM cache WHERE key = ?', rows)
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def _written(self, count):
+        self._writes += count
+        if self._writes >= self._cull_every:
+            self._writes = 0
+            self._cull()
+
+    def _cull(self):
+        """Удаляет просроченные записи, затем самые давно читавшиеся,
+        пока кэш не уложится в MAX_ENTRIES и MAX_SIZE."""
+        with self._db:
+            self._db.execute('BEGIN IMMEDIATE')
+            self._db.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),))
+            count, size = self._db.execute(
+                'SELECT count(*), total(size) FROM cache').fetchone()
+            if count > self._max_entries:
+                # как в стандартных бэкендах, освобождается 1/CULL_FREQUENCY
+                # кэша, чтобы не чистить его на каждой записи
+                excess = max(count - self._max_entries,
+                             count // self._cull_frequency)
+                self._db.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                    'ORDER BY accessed LIMIT ?)', (excess,))
+                count, size = self._db.execute(
+                    'SELECT count(*), total(size) FROM cache').fetchone()
+            if size > self._max_size:
+                excess = size - self._max_size * (
+                    1 - 1 / self._cull_frequency)
+                self._db.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM ('
+                    'SELECT key, size, sum(size) OVER (ORDER BY accessed '
+                    'ROWS UNBOUNDED PRECEDING) AS freed FROM cache) '
+                    'WHERE freed - size < ?)', (excess,))
+
+
+class ReadOnlyCache(BaseCache):
+    """Чтение из кэша с алиасом LOCATION без записи в него.
+
+    Через него работают запросы, читающие с реплики (см.
+    yatube.routers.cache_alias): отставшая реплика не должна класть
+    свои данные в общий кэш под ключами, построенными по свежим версиям.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._alias = location
+
+    @property
+    def _cache(self):
+        return caches[self._alias]
+
+    def get(self, key, default=None, version=None):
+        return self._cache.get(key, default, version)
+
+    def get_many(self, keys, version=None):
+        return self._cache.get_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return self._cache.has_key(key, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return False
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        pass
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return False
+
+    def delete(self, key, version=None):
+        pass
+
+    def clear(self):
+        pass
@@ -0,0 +1,127 @@
+"""Middleware проекта.
+
+QueryStatsMiddleware считает запросы, их суммарное время и повторы
+одинаковых по форме запросов (признак N+1) для каждого имени URL.
+При QUERY_STATS_HEADERS результат отдается в заголовках ответа,
+иначе пишется в лог yatube.queries. Превышение лимита из
+QUERY_BUDGETS логируется как предупреждение.
+
+ReadReplicaMiddleware отправляет анонимные чтения лент на реплики.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import routers
+
+logger = logging.getLogger('yatube.queries')
+
+# списки параметров IN (%s, %s, ...) и числовые литералы (LIMIT,
+# OFFSET) не меняют форму запроса
+IN_LIST = re.compile(r'\((?:%s, )*%s\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+
+def fingerprint(sql):
+    """Нормализованный текст запроса без значений параметров."""
+    return NUMBER.sub('?', IN_LIST.sub('(...)', sql))
+
+
+class QueryLog:
+    """Обертка execute_wrapper, собирающая статистику запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Запросы, выполненные больше одного раза, и число повторов."""
+        return {sql: count for sql, count in self.fingerprints.items()
+                if count > 1}
+
+
+class QueryStatsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = QueryLog()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.url_name if match else None
+        duplicates = log.duplicates
+        budget = settings.QUERY_BUDGETS.get(view)
+        if settings.QUERY_STATS_HEADERS:
+            response['X-Query-View'] = view or ''
+            response['X-Query-Count'] = log.count
+            response['X-Query-Time'] = f'{log.duration * 1000:.3f}'
+            response['X-Query-Duplicates'] = sum(
+                count - 1 for count in duplicates.values())
+            if budget is not None:
+                response['X-Query-Budget'] = budget
+        else:
+            logger.info(
+                '%s %s: %d queries, %.1f ms, duplicates: %s',
+                request.method, view, log.count, log.duration * 1000,
+                duplicates or '-',
+            )
+        if budget is not None and log.count > budget:
+            logger.warning(
+                '%s выполнил %d запросов при лимите %d',
+                view, log.count, budget)
+        return response
+
+
+class ReadReplicaMiddleware:
+    """Направляет анонимные GET-запросы из REPLICA_VIEWS на реплику.
+
+    После запроса с записью (POST и т.п.) клиент получает куку
+    REPLICA_PIN_COOKIE и на REPLICA_PIN_SECONDS читает только из
+    основной базы: реплика за это время успевает догнать изменения.
+    """
+    SAFE_METHODS = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = request.__dict__.pop('replica_token', None)
+            if token is not None:
+                routers.reset(token)
+        if settings.READ_REPLICAS and request.method not in self.SAFE_METHODS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (settings.READ_REPLICAS
+                and request.method in self.SAFE_METHODS
+                and request.resolver_match.url_name in settings.REPLICA_VIEWS
+                and settings.REPLICA_PIN_COOKIE not in request.COOKIES
+                and not request.user.is_authenticated):
+            request.replica_token = routers.use_replica()
@@ -0,0 +1,64 @@
+"""Маршрутизация чтения на реплики базы.
+
+ReadReplicaMiddleware выбирает реплику для подходящего запроса и
+сохраняет ее в контекстной переменной; ReplicaRouter направляет туда
+чтения этого запроса. Запись всегда идет в основную базу, и после
+первой записи запрос до конца читает тоже из нее, чтобы видеть
+собственные изменения.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+
+PRIMARY = 'default'
+# кэш без записи (yatube.cache.ReadOnlyCache) для чтений с реплики
+READ_ONLY_CACHE = 'read_only'
+# сессии и хранилище ключей sorl читаются сразу после записи и
+# должны быть свежими
+PRIMARY_ONLY_APPS = {'sessions', 'thumbnail'}
+
+_replica = ContextVar('replica', default=None)
+
+
+def use_replica():
+    """Направляет чтения текущего запроса на случайную реплику.
+
+    Возвращает токен для reset().
+    """
+    return _replica.set(random.choice(settings.READ_REPLICAS))
+
+
+def reset(token):
+    _replica.reset(token)
+
+
+def cache_alias():
+    """Алиас кэша для данных, прочитанных в текущем запросе.
+
+    Пока запрос читает с реплики, общий кэш только читается: реплика
+    может отставать, а ключи фрагментов и страниц строятся по версиям
+    из основной базы, и старые данные жили бы под свежим ключом.
+    """
+    return READ_ONLY_CACHE if _replica.get() else DEFAULT_CACHE_ALIAS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return PRIMARY
+        return _replica.get() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        # после записи запрос читает только из основной базы
+        _replica.set(None)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплика - копия основной базы, объекты из них совместимы
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # схема попадает на реплики вместе с данными при синхронизации
+        return db == PRIMARY
@@ -30,11 +30,27 @@ ALLOWED_HOSTS = [
     "testserver",
 ]
 
+# общий для всех воркеров кэш в файле SQLite (yatube.cache);
+# MAX_SIZE - предел суммарного размера значений в байтах
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+            'MAX_SIZE': 256 * 2 ** 20,
+        },
+    },
+    # общий кэш без записи для запросов, читающих с реплики
+    'read_only': {
+        'BACKEND': 'yatube.cache.ReadOnlyCache',
+        'LOCATION': 'default',
+    },
 }
+# manage.py test держит кэш в своем временном файле (yatube.test_runner),
+# pytest - в фикстуре из conftest.py
+TEST_RUNNER = 'yatube.test_runner.TempCacheRunner'
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -51,11 +67,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.middleware.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yatube.middleware.ReadReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -88,10 +106,46 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'CONN_MAX_AGE': 60,
+    },
+    # локальная реплика для чтения: копия основной базы, которую
+    # периодически обновляет manage.py sync_replica
+    'replica': {
+        'ENGINE': 'yatube.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        # соединение видит новую копию реплики только после переоткрытия
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+# прагмы для каждого нового соединения SQLite (posts.db): WAL, чтобы
+# чтения не ждали записи, ожидание блокировки вместо ошибки, кэш
+# страниц 64 МБ на соединение и чтение файла базы через mmap
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'memory',
 }
+# сколько раз posts.db.write_transaction пробует взять блокировку записи
+# (каждая попытка ждет busy_timeout) и первая пауза между ними, секунд
+WRITE_RETRY_ATTEMPTS = 5
+WRITE_RETRY_DELAY = 0.05
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+# реплики, на которые идут анонимные чтения страниц из REPLICA_VIEWS;
+# локальная реплика включается, когда ее файл уже создан
+READ_REPLICAS = [
+    alias for alias in ('replica',)
+    if os.path.exists(DATABASES[alias]['NAME'])
+]
+REPLICA_VIEWS = {'index', 'group_posts', 'profile', 'post'}
+# после записи клиент читает из основной базы, пока реплика не догонит
+REPLICA_PIN_COOKIE = 'primary_pin'
+REPLICA_PIN_SECONDS = 30
 
 
 # Password validation
@@ -150,4 +204,91 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# загрузки сразу пишутся во временный файл, а не держатся в памяти
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+# картинки постов при загрузке уменьшаются до POST_IMAGE_MAX_SIZE по
+# большей стороне и пересохраняются без EXIF; картинки больше
+# POST_IMAGE_MAX_PIXELS отклоняются по заголовку, не распаковываясь
+POST_IMAGE_MAX_SIZE = 2048
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_FORMAT = 'JPEG'
+POST_IMAGE_QUALITY = 85
+
+# превью картинок постов, которые готовятся заранее при сохранении поста;
+# геометрия и опции должны совпадать с тегом {% thumbnail %} в шаблонах
+POST_THUMBNAILS = [
+    ('500x500', {'crop': 'center', 'upscale': True}),
+]
+# число фоновых потоков для подготовки превью (0 - сразу в запросе)
+POST_THUMBNAIL_WORKERS = 2
+
+# время жизни закэшированных множеств подписок пользователей
+# (posts.follow_graph), секунд
+FOLLOW_GRAPH_TIMEOUT = 60 * 60
+# рекомендации подписок (posts.recommendations): сколько хранится на
+# пользователя и сколько показывает виджет, сколько соседей берется на
+# каждом шаге обхода графа и по сколько пользователей пишется за раз
+FOLLOW_SUGGESTIONS_SIZE = 20
+FOLLOW_SUGGESTIONS_SHOWN = 5
+FOLLOW_SUGGESTIONS_FANOUT = 100
+FOLLOW_SUGGESTIONS_BATCH = 500
+
 NUM_OBJECTS_PER_PAGE = 10
+# лента популярных постов (posts.trending): вес комментария падает
+# вдвое за TRENDING_HALF_LIFE секунд, оценки ниже TRENDING_MIN_SCORE
+# удаляются командой refresh_trending, в ленте не больше TRENDING_SIZE
+# постов; TRENDING_WINDOW - какие комментарии учитывает полный пересчет
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_MIN_SCORE = 0.05
+TRENDING_SIZE = 100
+TRENDING_WINDOW = 7 * 24 * 60 * 60
+# как часто пересчитывается сводка каталога сообществ, секунд
+GROUP_DIRECTORY_TIMEOUT = 60 * 5
+# сколько хранится готовая страница поста для анонимов (ключ - ее ETag,
+# так что правка и новые комментарии сразу дают новый ключ), секунд
+PAGE_CACHE_TIMEOUT = 60 * 10
+# комментариев на странице поста; более ранние подгружаются по курсору
+COMMENTS_PER_PAGE = 20
+# размер страницы read-only API (по умолчанию и максимальный, ?limit=)
+# и число строк, читаемых из базы за раз при выгрузке ?format=ndjson
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_EXPORT_CHUNK_SIZE = 500
+# сколько строк самое большее считает список админки с фильтром или
+# поиском (posts.paginators.EstimatedCountPaginator)
+ADMIN_COUNT_LIMIT = 10_000
+# режим пагинации для каждой ленты: 'numbered' - номера страниц
+# (COUNT и OFFSET), 'cursor' - ссылки вперед/назад по ключу (pub_date, id);
+# 'trending' упорядочена по оценке и листается только по номерам
+FEED_PAGINATION = {
+    'index': 'numbered',
+    'group_posts': 'numbered',
+    'profile': 'numbered',
+    'follow_index': 'cursor',
+    'trending': 'numbered',
+}
+
+# заголовки X-Query-* со статистикой SQL-запросов в ответах;
+# без них статистика пишется в лог yatube.queries
+QUERY_STATS_HEADERS = DEBUG
+# предельное число SQL-запросов на страницу (по имени URL) для
+# авторизованного пользователя, включая чтение сессии и пользователя;
+# не должно зависеть от размера страницы. Ленты сначала выбирают ключи
+# постов страницы для ETag, а затем сами посты по id. Профиль и пост
+# на холодном кэше еще читают подписки пользователя (posts.follow_graph),
+# профиль и лента подписок - рекомендации (posts.recommendations)
+QUERY_BUDGETS = {
+    'index': 5,
+    'group_posts': 6,
+    'group_list': 4,
+    'profile': 8,
+    'post': 5,
+    'post_comments': 4,
+    'follow_index': 5,
+    'trending': 4,
+    'search': 5,
+    'api_posts': 1,
+    'api_comments': 2,
+}
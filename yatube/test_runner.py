@@ -0,0 +1,35 @@
+"""Запуск тестов с отдельным файлом кэша.
+
+Тесты очищают кэш (cache.clear() и post_migrate при создании тестовой
+базы), поэтому каждый запуск получает свой файл во временном каталоге:
+кэш сервера на той же машине и параллельные запуски не затрагиваются.
+"""
+import copy
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def isolated_caches(directory):
+    """Настройка CACHES, у которой кэш по умолчанию лежит в directory."""
+    caches = copy.deepcopy(settings.CACHES)
+    caches['default']['LOCATION'] = os.path.join(
+        directory, 'cache.sqlite3')
+    return override_settings(CACHES=caches)
+
+
+class TempCacheRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='yatube-cache-')
+        self.caches_override = isolated_caches(self.cache_dir)
+        self.caches_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches_override.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)